@@ -0,0 +1,43 @@
+"""add like_count to posts
+
+Revision ID: 865fdcd4f0e2
+Revises: 620863a991df
+Create Date: 2026-10-18 09:30:41.207719
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "865fdcd4f0e2"
+down_revision: Union[str, None] = "620863a991df"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column("like_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    # заполнение счетчика по уже существующим лайкам
+    op.execute(
+        "UPDATE posts SET like_count = "
+        "(SELECT count(*) FROM likes_post WHERE likes_post.post_id = posts.id)"
+    )
+    op.create_index(
+        "ix_posts_like_count_id",
+        "posts",
+        ["like_count", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_like_count_id", table_name="posts")
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("like_count")
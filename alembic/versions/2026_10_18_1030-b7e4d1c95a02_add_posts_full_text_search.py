@@ -0,0 +1,66 @@
+"""add posts full text search
+
+Revision ID: b7e4d1c95a02
+Revises: 3f6c2b9d7a41
+Create Date: 2026-10-18 10:30:27.118463
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e4d1c95a02"
+down_revision: Union[str, None] = "3f6c2b9d7a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # колонка вычисляется Postgres при вставке и изменении поста
+        op.execute(
+            "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(body, '')), 'B')) STORED"
+        )
+        op.execute(
+            "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)"
+        )
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE posts_fts USING fts5("
+        "title, body, content='posts', content_rowid='id')"
+    )
+    op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    op.execute(
+        "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+        "INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+        "INSERT INTO posts_fts(posts_fts, rowid, title, body) "
+        "VALUES ('delete', old.id, old.title, old.body); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, body ON posts BEGIN "
+        "INSERT INTO posts_fts(posts_fts, rowid, title, body) "
+        "VALUES ('delete', old.id, old.title, old.body); "
+        "INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body); "
+        "END"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_posts_search_vector", table_name="posts")
+        op.execute("ALTER TABLE posts DROP COLUMN search_vector")
+        return
+
+    for trigger in ("posts_fts_insert", "posts_fts_delete", "posts_fts_update"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS posts_fts")
@@ -0,0 +1,92 @@
+"""add tables messages
+
+Revision ID: 5c8e2f7a9d13
+Revises: b7e4d1c95a02
+Create Date: 2026-10-18 11:00:41.208517
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c8e2f7a9d13"
+down_revision: Union[str, None] = "b7e4d1c95a02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "conversations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("direct_key", sa.String(length=50), nullable=True),
+        sa.Column("last_message_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "date_creation",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("direct_key"),
+    )
+    op.create_table(
+        "participants",
+        sa.Column("conversation_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["conversation_id"],
+            ["conversations.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("conversation_id", "user_id"),
+    )
+    op.create_index(
+        "ix_participants_user_id_conversation_id",
+        "participants",
+        ["user_id", "conversation_id"],
+        unique=False,
+    )
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("conversation_id", sa.Integer(), nullable=False),
+        sa.Column("id_user", sa.Integer(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column(
+            "date_creation",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["conversation_id"],
+            ["conversations.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["id_user"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_messages_conversation_id_id",
+        "messages",
+        ["conversation_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_conversation_id_id", table_name="messages")
+    op.drop_table("messages")
+    op.drop_index("ix_participants_user_id_conversation_id", table_name="participants")
+    op.drop_table("participants")
+    op.drop_table("conversations")
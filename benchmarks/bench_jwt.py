@@ -0,0 +1,76 @@
+"""
+Микро-бенчмарк подписи и проверки jwt-токенов.
+
+Сравнивает прежний способ (PEM-строка разбирается PyJWT на каждый вызов),
+заранее загруженные объекты ключей и кеш проверенных токенов.
+
+Запуск (нужны ключи из setting.auth_jwt и переменные окружения приложения):
+    python -m benchmarks.bench_jwt [--number 2000]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import jwt
+
+from src.core.config import setting
+from src.core.jwt_utils import (decode_jwt, encode_jwt, load_private_key,
+                                load_public_key, token_cache)
+
+
+def measure(name: str, func: Callable[[], object], number: int) -> float:
+    start: float = time.perf_counter()
+    for _ in range(number):
+        func()
+    elapsed: float = time.perf_counter() - start
+    ops: float = number / elapsed
+    print(f"{name:<40} {ops:>12,.0f} ops/s {elapsed / number * 1e6:>10.1f} us/op")
+    return ops
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JWT sign/verify benchmark")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    algorithm: str = setting.auth_jwt.algorithm
+    private_pem: str = setting.auth_jwt.private_key_path.read_text()
+    public_pem: str = setting.auth_jwt.public_key_path.read_text()
+    payload: dict = {
+        "sub": "1",
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=15),
+    }
+    token: str = encode_jwt(payload)
+    load_private_key()
+    load_public_key()
+
+    print("sign:")
+    before = measure(
+        "  PEM string (before)",
+        lambda: jwt.encode(payload, private_pem, algorithm=algorithm),
+        args.number,
+    )
+    after = measure("  key object (after)", lambda: encode_jwt(payload), args.number)
+    print(f"  speedup x{after / before:.2f}")
+
+    print("verify:")
+    before = measure(
+        "  PEM string (before)",
+        lambda: jwt.decode(token, public_pem, algorithms=[algorithm]),
+        args.number,
+    )
+    after = measure(
+        "  key object, no cache",
+        lambda: jwt.decode(token, load_public_key(), algorithms=[algorithm]),
+        args.number,
+    )
+    print(f"  speedup x{after / before:.2f}")
+    token_cache.clear()
+    cached = measure("  verified-token cache (after)", lambda: decode_jwt(token), args.number)
+    print(f"  speedup x{cached / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Нагрузочный бенчмарк HTTP-эндпоинтов.
+
+Заполняет БД набором данных (N пользователей, M постов, K лайков; генератор
+src.commands.seed с фиксированным seed), запускает приложение src.main:app
+в процессе (httpx.ASGITransport, Redis заменяется fakeredis, ограничение
+частоты запросов отключено: все клиенты идут с одного адреса) и измеряет
+задержку p50/p95/p99 и пропускную способность сценариев при заданном числе
+одновременных клиентов. Результат печатается таблицей и сохраняется в JSON
+для сравнения прогонов между релизами.
+
+Таблицы БД пересоздаются: для Postgres укажите отдельную пустую базу.
+
+Запуск (нужны ключи из setting.auth_jwt и переменные окружения приложения):
+    python -m benchmarks.load [--db-url URL] [--users 50] [--posts 500]
+        [--likes 2000] [--requests 200] [--concurrency 20] [--output load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import fakeredis
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from src.commands.seed import generate_dataset, user_email
+from src.core.config import COOKIE_NAME, setting
+from src.core.database import (Base, get_async_session, get_read_session,
+                               get_read_session_maker, get_session_maker)
+from src.core.jwt_utils import create_jwt
+from src.core.redis_client import get_redis, set_redis, set_sync_redis
+from src.main import app
+
+PASSWORD = "password"
+
+Scenario = Callable[[AsyncClient, random.Random], Awaitable[Response]]
+
+
+def use_fake_redis() -> None:
+    server = FakeServer()
+    set_redis(FakeRedis(server=server, decode_responses=True))
+    set_redis(FakeRedis(server=server), decode_responses=False)
+    set_sync_redis(fakeredis.FakeRedis(server=server, decode_responses=True))
+    FastAPICache.init(
+        RedisBackend(get_redis(decode_responses=False)), prefix="fastapi-cache"
+    )
+
+
+def use_engine(engine: AsyncEngine) -> None:
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    app.dependency_overrides[get_read_session_maker] = lambda: session_maker
+
+
+def make_scenarios(users: int, posts: int) -> dict[str, Scenario]:
+    def cookies(rng: random.Random) -> dict[str, str]:
+        return {COOKIE_NAME: create_jwt(str(rng.randint(1, users)))}
+
+    async def index(client: AsyncClient, rng: random.Random) -> Response:
+        return await client.get("/")
+
+    async def feed(client: AsyncClient, rng: random.Random) -> Response:
+        return await client.get("/posts/users/", cookies=cookies(rng))
+
+    async def login(client: AsyncClient, rng: random.Random) -> Response:
+        return await client.post(
+            "/users/login",
+            data={"username": user_email(rng.randint(1, users)), "password": PASSWORD},
+        )
+
+    async def create_post(client: AsyncClient, rng: random.Random) -> Response:
+        return await client.post(
+            "/posts/",
+            data={"title": "Load", "content": "Load test post"},
+            cookies=cookies(rng),
+        )
+
+    async def like(client: AsyncClient, rng: random.Random) -> Response:
+        return await client.post(
+            f"/posts/{rng.randint(1, posts)}/likes", cookies=cookies(rng)
+        )
+
+    return {
+        "index": index,
+        "feed": feed,
+        "login": login,
+        "create_post": create_post,
+        "like": like,
+    }
+
+
+def percentile(latencies: list[float], percent: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1]
+
+
+async def run_scenario(
+    client: AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    rng: random.Random,
+) -> dict:
+    """
+    Выполняет requests запросов сценария concurrency параллельными клиентами
+    """
+    latencies: list[float] = list()
+    statuses: Counter[str] = Counter()
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            start: float = time.perf_counter()
+            try:
+                response: Response = await scenario(client, rng)
+            except Exception as exp:
+                statuses[type(exp).__name__] += 1
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] += 1
+            if response.status_code >= 500:
+                errors += 1
+
+    start: float = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed: float = time.perf_counter() - start
+
+    result: dict = {
+        "requests": requests,
+        "statuses": dict(sorted(statuses.items())),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+    if latencies:
+        result["latency_ms"] = {
+            "mean": round(statistics.fmean(latencies) * 1000, 2),
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        }
+    return result
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    engine: AsyncEngine = create_async_engine(args.db_url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    use_fake_redis()
+    # иначе сценарии login и like измеряют в основном ответы 429
+    setting.rate_limit.enabled = False
+    # таблицы пустые: пользователи и посты получают id 1..N и 1..M
+    await generate_dataset(
+        async_sessionmaker(engine, expire_on_commit=False),
+        users=args.users,
+        posts=args.posts,
+        likes=args.likes,
+        rng=rng,
+        password=PASSWORD,
+    )
+    use_engine(engine)
+
+    results: dict[str, dict] = dict()
+    scenarios: dict[str, Scenario] = make_scenarios(args.users, args.posts)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                client, scenarios[name], args.requests, args.concurrency, rng
+            )
+            print_result(name, results[name])
+    await engine.dispose()
+    app.dependency_overrides.clear()
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "dialect": engine.dialect.name,
+        "params": {
+            "users": args.users,
+            "posts": args.posts,
+            "likes": args.likes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+def print_result(name: str, result: dict) -> None:
+    latency: Optional[dict] = result.get("latency_ms")
+    if latency is None:
+        print(f"{name:<12} no successful requests, {result['statuses']}")
+        return
+    print(
+        f"{name:<12} {result['throughput_rps']:>9.1f} req/s"
+        f" p50 {latency['p50']:>8.2f} ms p95 {latency['p95']:>8.2f} ms"
+        f" p99 {latency['p99']:>8.2f} ms  {result['statuses']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP load benchmark")
+    parser.add_argument(
+        "--db-url",
+        default=f"sqlite+aiosqlite:///{Path(tempfile.gettempdir()) / 'bench.sqlite3'}",
+        help="URL БД (таблицы пересоздаются)",
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--likes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["index", "feed", "login", "create_post", "like"],
+        choices=["index", "feed", "login", "create_post", "like"],
+    )
+    parser.add_argument("--output", type=Path, help="файл для результата в JSON")
+    args = parser.parse_args()
+
+    report: dict = asyncio.run(run(args))
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Микро-бенчмарк сериализации списков постов в JSON.
+
+Строки выбираются из SQLite в памяти заранее, измеряется только путь от
+результата запроса до тела ответа:
+    orm_jsonable   - ORM-объекты Post, jsonable_encoder и json.dumps (JSONResponse)
+    orm_models     - ORM-объекты с автором, PostWithAutor на строку в цикле,
+                     jsonable_encoder и json.dumps
+    rows_adapter   - колонки, проверка словарей строк TypeAdapter(list[PostWithAutor])
+                     одним вызовом, сериализация pydantic-core и orjson (маршрут
+                     с response_model и ORJSONResponse)
+    rows_dump_json - колонки, TypeAdapter: проверка и dump_json
+    rows_orjson    - колонки без проверки (доверенные строки БД), orjson
+
+Запуск (нужны переменные окружения приложения):
+    python -m benchmarks.serialization [--posts 10000] [--repeat 10]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from src.core.database import Base
+from src.posts.crud import POST_READ_COLUMNS, POST_WITH_AUTHOR_COLUMNS
+from src.posts.models import Post
+from src.posts.schemas import POSTS_WITH_AUTHOR, PostWithAutor
+from src.users.models import User
+
+
+def fill_db(session: Session, posts: int) -> None:
+    session.execute(
+        insert(User),
+        [
+            {
+                "id": num,
+                "username": f"user{num}",
+                "email": f"user{num}@bench.local",
+                "hashed_password": "hash",
+            }
+            for num in range(1, 101)
+        ],
+    )
+    start = datetime(2026, 1, 1)
+    session.execute(
+        insert(Post),
+        [
+            {
+                "id": num,
+                "title": f"Post {num}",
+                "body": "Benchmark post body " * 10,
+                "date_creation": start + timedelta(seconds=num),
+                "id_user": num % 100 + 1,
+                "like_count": num % 50,
+            }
+            for num in range(1, posts + 1)
+        ],
+    )
+    session.commit()
+
+
+def measure(name: str, func: Callable[[], bytes], repeat: int, posts: int) -> None:
+    body: bytes = func()
+    timings: list[float] = list()
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    per_10k: float = statistics.median(timings) * 1000 * 10_000 / posts
+    print(f"{name:<16} {per_10k:>9.2f} ms / 10k posts  {len(body):>10,} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON serialization of post lists")
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        fill_db(session, args.posts)
+    # отдельные сессии: иначе у объектов Post загружен и user
+    with Session(engine) as session:
+        orm_posts: list[Post] = list(session.scalars(select(Post)))
+    with Session(engine) as session:
+        orm_with_user: list[Post] = list(
+            session.scalars(select(Post).options(joinedload(Post.user)))
+        )
+        rows = session.execute(select(*POST_READ_COLUMNS)).all()
+        rows_with_user = session.execute(
+            select(*POST_WITH_AUTHOR_COLUMNS).join(Post.user)
+        ).all()
+
+    def orm_jsonable() -> bytes:
+        return JSONResponse(jsonable_encoder(orm_posts)).body
+
+    def orm_models() -> bytes:
+        posts = [
+            PostWithAutor(
+                id=post.id,
+                user=post.user.username,
+                title=post.title,
+                body=post.body,
+                data_create=post.date_creation,
+                like_count=post.like_count,
+            )
+            for post in orm_with_user
+        ]
+        return JSONResponse(jsonable_encoder(posts)).body
+
+    def rows_adapter() -> bytes:
+        posts = POSTS_WITH_AUTHOR.validate_python(
+            [row._asdict() for row in rows_with_user]
+        )
+        return ORJSONResponse(POSTS_WITH_AUTHOR.dump_python(posts, mode="json")).body
+
+    def rows_dump_json() -> bytes:
+        return POSTS_WITH_AUTHOR.dump_json(
+            POSTS_WITH_AUTHOR.validate_python([row._asdict() for row in rows_with_user])
+        )
+
+    def rows_orjson() -> bytes:
+        return ORJSONResponse([row._asdict() for row in rows]).body
+
+    print(f"{args.posts} posts, median of {args.repeat} runs")
+    for name, func in (
+        ("orm_jsonable", orm_jsonable),
+        ("orm_models", orm_models),
+        ("rows_adapter", rows_adapter),
+        ("rows_dump_json", rows_dump_json),
+        ("rows_orjson", rows_orjson),
+    ):
+        measure(name, func, args.repeat, args.posts)
+    assert json.loads(rows_orjson()) == json.loads(orm_jsonable())
+    assert orjson.loads(rows_dump_json()) == json.loads(orm_models())
+
+
+if __name__ == "__main__":
+    main()
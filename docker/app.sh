@@ -3,7 +3,11 @@
 #cd src
 #cd app
 
+# каталог метрик Prometheus, общий для воркеров gunicorn (очищается при старте)
+export PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus_multiproc
+rm -rf "${PROMETHEUS_MULTIPROC_DIR}" && mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+
 .venv/bin/alembic upgrade head
-.venv/bin/gunicorn src.main:app --workers 2 --worker-class uvicorn.workers.UvicornWorker --bind=0.0.0.0:8000
+.venv/bin/gunicorn src.main:app --config docker/gunicorn.conf.py --workers 2 --worker-class uvicorn.workers.UvicornWorker --bind=0.0.0.0:8000
 
 ## скрипт для запуска миграции и сервера
\ No newline at end of file
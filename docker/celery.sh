@@ -4,8 +4,10 @@
 
 if [[ "${1}" == "celery" ]]; then
   .venv/bin/celery -A src.tasks.tasks:celery worker -l INFO
+elif [[ "${1}" == "beat" ]]; then
+  .venv/bin/celery -A src.tasks.tasks:celery beat -l INFO
 elif [[ "${1}" == "flower" ]]; then
   .venv/bin/celery -A src.tasks.tasks:celery flower
  fi
 
-## скрипт для заруска по параметрам celery или flower
\ No newline at end of file
+## скрипт для заруска по параметрам celery, beat или flower
\ No newline at end of file
@@ -0,0 +1,13 @@
+import os
+
+from prometheus_client import multiprocess
+
+# web доступен только через nginx: адрес клиента берется из X-Forwarded-For
+# (используется в ограничении частоты запросов по IP), но только если запрос
+# пришел с адреса nginx (см. docker-compose.yml), иначе заголовок игнорируется
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def child_exit(server, worker):
+    # файлы метрик завершившегося воркера больше не учитываются в live-gauge
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,27 @@
+"""
+Пересчет денормализованного счетчика лайков постов.
+
+Запуск:
+    python -m src.commands.reconcile_likes
+"""
+
+import asyncio
+import logging
+
+from src.core.database import async_session_maker, engine
+from src.core.log import setup_logging
+from src.posts.crud import reconcile_like_count
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    setup_logging()
+    async with async_session_maker() as session:
+        fixed: int = await reconcile_like_count(session)
+    await engine.dispose()
+    logger.info("Reconcile finished, fixed posts: %d", fixed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
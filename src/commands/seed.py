@@ -0,0 +1,341 @@
+"""
+Массовая загрузка пользователей, постов и лайков.
+
+Данные генерируются (generate) или читаются из NDJSON-файлов (import) и пишутся
+пачками: в Postgres через COPY, в SQLite многострочными INSERT (executemany),
+каждая пачка - отдельная транзакция. Хеш пароля bcrypt вычисляется один раз
+на каждый различный пароль. После загрузки пересчитывается счетчик лайков постов.
+
+Форматы строк NDJSON:
+    users: {"username": ..., "email": ..., "password" или "hashed_password": ...}
+    posts: {"id_user": ..., "title": ..., "body": ...}
+    likes: {"post_id": ..., "user_id": ...}
+
+Запуск:
+    python -m src.commands.seed generate --users 100000 --posts 1000000 --likes 10000000
+    python -m src.commands.seed import --users users.ndjson --posts posts.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.database import async_session_maker, engine
+from src.core.jwt_utils import create_hash_password
+from src.core.log import setup_logging
+from src.posts.crud import reconcile_like_count
+from src.posts.models import LikesPost, Post
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10_000
+
+COLUMNS: dict[str, tuple[str, ...]] = {
+    "users": ("id", "username", "email", "hashed_password", "is_superuser", "is_active"),
+    "posts": ("id", "title", "body", "id_user"),
+    "likes_post": ("post_id", "user_id"),
+}
+
+
+@lru_cache(maxsize=128)
+def hash_password(password: str) -> str:
+    return create_hash_password(password).decode()
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def write_batch(session: AsyncSession, table: Table, rows: list[dict]) -> None:
+    """
+    Пишет пачку строк: COPY в Postgres (asyncpg), executemany в остальных БД
+    """
+    columns: tuple[str, ...] = COLUMNS[table.name]
+    if session.get_bind().dialect.name == "postgresql":
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name,
+            records=[tuple(row[column] for column in columns) for row in rows],
+            columns=columns,
+        )
+    else:
+        await session.execute(insert(table), rows)
+
+
+async def load_rows(
+    session_maker: async_sessionmaker[AsyncSession],
+    table: Table,
+    rows: Iterable[dict],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    total: Optional[int] = None,
+) -> int:
+    """
+        Загружает строки в таблицу пачками (транзакция на пачку) с выводом прогресса
+    :return: int
+        количество загруженных строк
+    """
+    loaded = 0
+    start: float = time.perf_counter()
+    for batch in batched(rows, batch_size):
+        async with session_maker() as session:
+            await write_batch(session, table, batch)
+            await session.commit()
+        loaded += len(batch)
+        elapsed: float = time.perf_counter() - start
+        logger.info(
+            "%s: %d%s rows, %.0f rows/s",
+            table.name,
+            loaded,
+            f"/{total}" if total is not None else "",
+            loaded / elapsed,
+        )
+    return loaded
+
+
+async def max_id(session_maker: async_sessionmaker[AsyncSession], column) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(func.coalesce(func.max(column), 0)))
+
+
+async def reset_sequences(session_maker: async_sessionmaker[AsyncSession]) -> None:
+    """
+    Строки загружаются с явными id: последовательности Postgres сдвигаются за max(id)
+    """
+    async with session_maker() as session:
+        if session.get_bind().dialect.name != "postgresql":
+            return
+        for table in ("users", "posts"):
+            await session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                )
+            )
+        await session.commit()
+
+
+def user_email(id_user: int) -> str:
+    return f"user{id_user}@seed.local"
+
+
+def generate_users(first_id: int, count: int, password: str) -> Iterator[dict]:
+    hashed_password: str = hash_password(password)
+    for id_user in range(first_id, first_id + count):
+        yield {
+            "id": id_user,
+            "username": f"user{id_user}",
+            "email": user_email(id_user),
+            "hashed_password": hashed_password,
+            "is_superuser": False,
+            "is_active": True,
+        }
+
+
+def generate_posts(first_id: int, authors: list[int]) -> Iterator[dict]:
+    for id_post, id_user in enumerate(authors, start=first_id):
+        yield {
+            "id": id_post,
+            "title": f"Post {id_post}",
+            "body": f"Generated post {id_post}",
+            "id_user": id_user,
+        }
+
+
+def generate_likes(
+    first_post: int,
+    authors: list[int],
+    first_user: int,
+    users: int,
+    count: int,
+    rng: random.Random,
+) -> Iterator[dict]:
+    """
+    Лайки распределяются по постам поровну, пользователи поста различны
+    и не совпадают с автором
+    """
+    posts: int = len(authors)
+    for num, id_author in enumerate(authors):
+        per_post: int = min(count // posts + (num < count % posts), users - 1)
+        fans: list[int] = rng.sample(range(first_user, first_user + users), per_post + 1)
+        fans = [id_user for id_user in fans if id_user != id_author][:per_post]
+        for id_user in sorted(fans):
+            yield {"post_id": first_post + num, "user_id": id_user}
+
+
+async def generate_dataset(
+    session_maker: async_sessionmaker[AsyncSession],
+    users: int,
+    posts: int,
+    likes: int,
+    rng: random.Random,
+    password: str = "password",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Генерирует и загружает данные, id продолжают уже существующие в таблицах
+    """
+    first_user: int = await max_id(session_maker, User.id) + 1
+    first_post: int = await max_id(session_maker, Post.id) + 1
+    authors: list[int] = [
+        rng.randrange(first_user, first_user + users) for _ in range(posts)
+    ]
+
+    await load_rows(
+        session_maker,
+        User.__table__,
+        generate_users(first_user, users, password),
+        batch_size,
+        users,
+    )
+    await load_rows(
+        session_maker,
+        Post.__table__,
+        generate_posts(first_post, authors),
+        batch_size,
+        posts,
+    )
+    if users > 1 and posts:
+        await load_rows(
+            session_maker,
+            LikesPost.__table__,
+            generate_likes(first_post, authors, first_user, users, likes, rng),
+            batch_size,
+            min(likes, posts * (users - 1)),
+        )
+    await finish(session_maker)
+
+
+def read_ndjson(path: Path) -> Iterator[dict]:
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def users_from_ndjson(path: Path, first_id: int) -> Iterator[dict]:
+    for id_user, row in enumerate(read_ndjson(path), start=first_id):
+        yield {
+            "id": id_user,
+            "username": row.get("username"),
+            "email": row["email"],
+            "hashed_password": row.get("hashed_password")
+            or hash_password(row["password"]),
+            "is_superuser": row.get("is_superuser", False),
+            "is_active": row.get("is_active", True),
+        }
+
+
+def posts_from_ndjson(path: Path, first_id: int) -> Iterator[dict]:
+    for id_post, row in enumerate(read_ndjson(path), start=first_id):
+        yield {
+            "id": id_post,
+            "title": row.get("title", ""),
+            "body": row.get("body", ""),
+            "id_user": row["id_user"],
+        }
+
+
+def likes_from_ndjson(path: Path) -> Iterator[dict]:
+    for row in read_ndjson(path):
+        yield {"post_id": row["post_id"], "user_id": row["user_id"]}
+
+
+async def import_dataset(
+    session_maker: async_sessionmaker[AsyncSession],
+    users: Optional[Path],
+    posts: Optional[Path],
+    likes: Optional[Path],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Загружает данные из NDJSON-файлов (id пользователей и постов назначаются
+    по порядку строк после уже существующих)
+    """
+    if users is not None:
+        first_user: int = await max_id(session_maker, User.id) + 1
+        await load_rows(
+            session_maker,
+            User.__table__,
+            users_from_ndjson(users, first_user),
+            batch_size,
+        )
+    if posts is not None:
+        first_post: int = await max_id(session_maker, Post.id) + 1
+        await load_rows(
+            session_maker,
+            Post.__table__,
+            posts_from_ndjson(posts, first_post),
+            batch_size,
+        )
+    if likes is not None:
+        await load_rows(
+            session_maker, LikesPost.__table__, likes_from_ndjson(likes), batch_size
+        )
+    await finish(session_maker)
+
+
+async def finish(session_maker: async_sessionmaker[AsyncSession]) -> None:
+    await reset_sequences(session_maker)
+    async with session_maker() as session:
+        fixed: int = await reconcile_like_count(session)
+    logger.info("Like counters updated for %d posts", fixed)
+
+
+async def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Bulk load users, posts and likes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="сгенерировать данные")
+    generate.add_argument("--users", type=int, default=1000)
+    generate.add_argument("--posts", type=int, default=10_000)
+    generate.add_argument("--likes", type=int, default=100_000)
+    generate.add_argument("--password", default="password")
+    generate.add_argument("--seed", type=int, default=42)
+
+    load = commands.add_parser("import", help="загрузить данные из NDJSON")
+    load.add_argument("--users", type=Path)
+    load.add_argument("--posts", type=Path)
+    load.add_argument("--likes", type=Path)
+    args = parser.parse_args()
+
+    start: float = time.perf_counter()
+    if args.command == "generate":
+        await generate_dataset(
+            async_session_maker,
+            users=args.users,
+            posts=args.posts,
+            likes=args.likes,
+            rng=random.Random(args.seed),
+            password=args.password,
+            batch_size=args.batch_size,
+        )
+    else:
+        await import_dataset(
+            async_session_maker,
+            users=args.users,
+            posts=args.posts,
+            likes=args.likes,
+            batch_size=args.batch_size,
+        )
+    await engine.dispose()
+    logger.info("Seed finished in %.1f s", time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
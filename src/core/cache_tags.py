@@ -0,0 +1,99 @@
+"""
+Инвалидация кеша fastapi-cache по тегам.
+
+Каждому тегу соответствует счетчик-версия в Redis, версия входит в ключ кеша.
+Запись, изменившая данные, увеличивает версию тега - старые ключи перестают
+использоваться и удаляются Redis по истечении срока хранения.
+"""
+
+import hashlib
+import logging
+import uuid
+from typing import Any, Callable, Optional
+
+from redis.exceptions import RedisError
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = "cache-tag"
+TAG_FEED = "feed"
+
+
+def author_tag(id_user: int) -> str:
+    """
+    Тег постов пользователя
+    """
+    return f"author:{id_user}"
+
+
+async def get_tag_versions(*tags: str) -> list[str]:
+    """
+        Текущие версии тегов
+    :param tags: str
+        теги
+    :return: list[str]
+        версии тегов (в том же порядке)
+    """
+    versions: list[Optional[str]] = await get_redis().mget(
+        [f"{TAG_PREFIX}:{tag}" for tag in tags]
+    )
+    return [version or "0" for version in versions]
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """
+        Инвалидирует закешированные ответы с указанными тегами.
+        Ошибки Redis не прерывают операцию записи, а только логируются
+    :param tags: str
+        теги
+    """
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{TAG_PREFIX}:{tag}")
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Error invalidate cache tags %s", tags)
+
+
+def tagged_key_builder(tags: Callable[[dict[str, Any]], list[str]]):
+    """
+        Создает key_builder для декоратора fastapi_cache.decorator.cache.
+        Ключ строится по пути и параметрам запроса и версиям тегов
+    :param tags: Callable[[dict[str, Any]], list[str]]
+        функция, возвращающая теги ответа по аргументам эндпоинта
+    :return:
+        key_builder
+    """
+
+    async def key_builder(
+        func: Callable[..., Any],
+        namespace: str = "",
+        *,
+        request: Optional[Request] = None,
+        response: Optional[Response] = None,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> str:
+        query: str = ""
+        if request is not None:
+            query = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+        endpoint_tags: list[str] = tags(kwargs)
+        try:
+            versions: list[str] = await get_tag_versions(*endpoint_tags)
+        except RedisError:
+            # без версий тегов нельзя гарантировать актуальность - промах кеша
+            logger.warning("Error get cache tag versions %s", endpoint_tags)
+            return f"{namespace}:{uuid.uuid4().hex}"
+        raw_key: str = f"{func.__module__}:{func.__name__}:{query}"
+        key: str = hashlib.md5(raw_key.encode()).hexdigest()
+        tag_part: str = ",".join(
+            f"{tag}={version}" for tag, version in zip(endpoint_tags, versions)
+        )
+        return f"{namespace}:{key}:{tag_part}"
+
+    return key_builder
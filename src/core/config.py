@@ -1,5 +1,5 @@
-import logging
 from pathlib import Path
+from typing import Literal, Optional
 
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -13,15 +13,10 @@ DB_PATH = BASE_DIR / "chat.sqlite3"
 
 COOKIE_NAME = "bonds_chat"
 
-templates = Jinja2Templates(directory=DIR_TEMPLATES)
-
+# cookie "чтения своих записей": чтение из основной БД сразу после записи
+PRIMARY_COOKIE_NAME = "bonds_chat_primary"
 
-def configure_logging(level=logging.INFO):
-    logging.basicConfig(
-        level=level,
-        datefmt="%Y-%m-%d %H:%M:%S",
-        format="[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(levelname)-7s - %(message)s",
-    )
+templates = Jinja2Templates(directory=DIR_TEMPLATES)
 
 
 class SettingConn(BaseSettings):
@@ -49,6 +44,17 @@ class DbSetting(BaseSettings):
     url: str = f"postgresql+asyncpg://{setting_conn.postgres_user}:{setting_conn.postgres_password}@{setting_conn.postgres_host}:{setting_conn.postgres_port}/{setting_conn.postgres_db}"
     # url: str = f"sqlite+aiosqlite:///{DB_PATH}"
     echo: bool = False
+    # пул соединений на процесс (воркер gunicorn): pool_size + max_overflow
+    # умноженные на число воркеров не должны превышать max_connections Postgres
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # реплики для чтения (GET-эндпоинты), пустой список - все запросы к основной БД
+    replica_urls: list[str] = list()
+    # после записи запросы пользователя на чтение идут в основную БД (сек.)
+    replica_sticky_seconds: int = 5
 
 
 class AuthJWT(BaseModel):
@@ -57,11 +63,124 @@ class AuthJWT(BaseModel):
     algorithm: str = "RS256"
     access_token_expire_minutes: int = 60
     refresh_token_expire_day: int = 30
+    token_cache_size: int = 10_000
+
+
+class PaginationSetting(BaseModel):
+    page_size: int = 20
+    max_page_size: int = 100
+
+
+class FragmentCacheSetting(BaseModel):
+    l1_maxsize: int = 256
+    l1_ttl: int = 60
+    expire: int = 6 * 60 * 60
+
+
+class ExportSetting(BaseModel):
+    batch_size: int = 1000
+
+
+class UserCacheSetting(BaseModel):
+    maxsize: int = 10_000
+    ttl: int = 30
+
+
+class HashSetting(BaseModel):
+    workers: int = 2
+    max_queue: int = 64
+
+
+class CacheSetting(BaseModel):
+    # ответы инвалидируются по тегам при записи, срок хранения - страховка
+    expire: int = 6 * 60 * 60
+
+
+class SmtpPoolSetting(BaseModel):
+    size: int = 2
+    max_idle: int = 30
+    timeout: int = 30
+
+
+class DigestSetting(BaseModel):
+    # период отправки дайджестов лайков (сек.)
+    window: int = 300
+    max_per_hour: int = 4
+    max_items: int = 20
+
+
+class OutboxSetting(BaseModel):
+    batch_size: int = 100
+    # период опроса таблицы outbox, если новых записей не было (сек.)
+    poll_interval: float = 1.0
+
+
+class QueryBudgetSetting(BaseModel):
+    # проверка числа SQL-запросов на HTTP-запрос (src.core.query_budget)
+    enabled: bool = False
+    # warn - предупреждение в лог, raise - исключение ExceptQueryBudget (для тестов)
+    mode: Literal["warn", "raise"] = "warn"
+    # бюджет маршрутов без декоратора query_budget (None - без ограничения)
+    default_budget: Optional[int] = None
+    # столько одинаковых запросов за HTTP-запрос считается признаком N+1
+    repeat_threshold: int = 3
+
+
+class RealtimeSetting(BaseModel):
+    # событий в очереди отправки WebSocket-соединения, при переполнении клиент отключается
+    queue_size: int = 100
+
+
+class MessagesSetting(BaseModel):
+    # участников диалога, включая создателя
+    max_participants: int = 10
+    max_length: int = 4000
+
+
+class RateLimitRule(BaseModel):
+    # пополнение корзины (запросов в секунду) и ее емкость (допустимый всплеск)
+    rate: float
+    burst: int
+    # ip - по адресу клиента, user - по пользователю из cookie (без cookie - по адресу)
+    per: Literal["ip", "user"] = "ip"
+
+
+class RateLimitSetting(BaseModel):
+    enabled: bool = True
+    # отклоненные клиенты, которым отказывается без обращения к Redis (на процесс)
+    deny_cache_size: int = 10_000
+    rules: dict[str, RateLimitRule] = {
+        "login": RateLimitRule(rate=10 / 60, burst=10),
+        "regdata": RateLimitRule(rate=2 / 60, burst=5),
+        "like": RateLimitRule(rate=2, burst=30, per="user"),
+    }
+
+
+class LoggingSetting(BaseModel):
+    level: str = "INFO"
+    # JSON-строка на запись, False - текстовый формат (локальная разработка)
+    json_format: bool = True
+    # доля выводимых записей ниже WARNING по логгерам (горячие пути)
+    sampling: dict[str, float] = {"src.users.crud.lookup": 0.01}
 
 
 class Setting(BaseSettings):
     db: DbSetting = DbSetting()
     auth_jwt: AuthJWT = AuthJWT()
+    pagination: PaginationSetting = PaginationSetting()
+    user_cache: UserCacheSetting = UserCacheSetting()
+    hashing: HashSetting = HashSetting()
+    cache: CacheSetting = CacheSetting()
+    export: ExportSetting = ExportSetting()
+    fragment_cache: FragmentCacheSetting = FragmentCacheSetting()
+    smtp_pool: SmtpPoolSetting = SmtpPoolSetting()
+    digest: DigestSetting = DigestSetting()
+    outbox: OutboxSetting = OutboxSetting()
+    query_budget: QueryBudgetSetting = QueryBudgetSetting()
+    realtime: RealtimeSetting = RealtimeSetting()
+    messages: MessagesSetting = MessagesSetting()
+    rate_limit: RateLimitSetting = RateLimitSetting()
+    logging: LoggingSetting = LoggingSetting()
 
 
 setting = Setting()
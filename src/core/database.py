@@ -1,23 +1,109 @@
-from typing import AsyncGenerator
+import random
+from typing import Any, AsyncGenerator
 
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession, async_sessionmaker,
                                     create_async_engine)
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 
-from src.core.config import setting
+from src.core.config import PRIMARY_COOKIE_NAME, DbSetting, setting
+from src.core.pool_stats import InstrumentedQueuePool, PoolStats, instrument_engine
 
 
 class Base(DeclarativeBase):
     pass
 
 
+def pool_options(db: DbSetting, url: str) -> dict[str, Any]:
+    """
+    Параметры пула соединений (SQLite использует пул по умолчанию)
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return dict()
+    return dict(
+        poolclass=InstrumentedQueuePool,
+        pool_size=db.pool_size,
+        max_overflow=db.max_overflow,
+        pool_timeout=db.pool_timeout,
+        pool_recycle=db.pool_recycle,
+        pool_pre_ping=db.pool_pre_ping,
+    )
+
+
 engine = create_async_engine(
     url=setting.db.url,
     echo=setting.db.echo,
+    **pool_options(setting.db, setting.db.url),
 )
+pool_stats: PoolStats = instrument_engine(engine)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engines: list[AsyncEngine] = [
+    create_async_engine(url=url, echo=setting.db.echo, **pool_options(setting.db, url))
+    for url in setting.db.replica_urls
+]
+replica_pool_stats: list[PoolStats] = [
+    instrument_engine(replica, f"replica{num}")
+    for num, replica in enumerate(replica_engines)
+]
+replica_session_makers: list[async_sessionmaker[AsyncSession]] = [
+    async_sessionmaker(replica, expire_on_commit=False) for replica in replica_engines
+]
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session: Session) -> None:
+    session.info["committed"] = True
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+
+async def get_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
+        if session.info.get("committed"):
+            # ReadYourWritesMiddleware закрепит чтение пользователя за основной БД
+            request.state.db_committed = True
+
+
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    """
+    Фабрика сессий для потоковых ответов: сессия из get_async_session закрывается
+    до отправки тела ответа, поэтому генератор открывает собственную сессию
+    """
+    return async_session_maker
+
+
+def get_read_session_maker(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Фабрика сессий для чтения: случайная реплика или основная БД, если реплики
+    не заданы или пользователь недавно выполнял запись (cookie PRIMARY_COOKIE_NAME)
+    """
+    if not replica_session_makers or request.cookies.get(PRIMARY_COOKIE_NAME):
+        return async_session_maker
+    return random.choice(replica_session_makers)
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для эндпоинтов только на чтение (см. get_read_session_maker)
+    """
+    async with get_read_session_maker(request)() as session:
+        yield session
+
+
+def dialect_insert(session: AsyncSession, entity: Any):
+    """
+    Возвращает INSERT диалекта БД сессии (поддерживает ON CONFLICT ... RETURNING)
+    :param session: AsyncSession
+        сессия БД
+    :param entity:
+        модель или таблица
+    :return:
+        postgresql.insert или sqlite.insert
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return pg_insert(entity)
+    return sqlite_insert(entity)
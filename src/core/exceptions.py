@@ -8,3 +8,23 @@ class ExceptDB(Exception):
 
 class ExceptUser(Exception):
     pass
+
+
+class ExceptCursor(Exception):
+    pass
+
+
+class NotFindPost(Exception):
+    pass
+
+
+class ExceptBusy(Exception):
+    pass
+
+
+class ExceptQueryBudget(Exception):
+    pass
+
+
+class NotFindConversation(Exception):
+    pass
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from src.core.config import setting
+from src.core.exceptions import ExceptBusy
+from src.core.metrics import HASH_LATENCY, HASH_PENDING, HASH_REJECTED
+from src.core.stats import Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HashExecutor:
+    """
+    Ограниченный пул потоков для bcrypt: хеширование не блокирует event loop,
+    а при переполнении очереди запрос сразу отклоняется
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        """
+        :param workers: int
+            количество потоков
+        :param max_queue: int
+            максимальное число задач в работе и в очереди
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self.pending = 0
+        self.max_pending = 0
+        self.rejected = 0
+        self.latency = Histogram()
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+            Выполняет func(*args) в пуле потоков
+        :raise ExceptBusy:
+            если очередь заполнена
+        """
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            HASH_REJECTED.inc()
+            logger.warning("Hash executor is saturated, pending %d", self.pending)
+            raise ExceptBusy("Hash executor is saturated")
+        self.pending += 1
+        HASH_PENDING.inc()
+        self.max_pending = max(self.max_pending, self.pending)
+        start: float = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            HASH_PENDING.dec()
+            elapsed: float = time.perf_counter() - start
+            self.latency.observe(elapsed)
+            HASH_LATENCY.observe(elapsed)
+
+    def stats(self) -> dict:
+        """
+        Метрики пула: глубина очереди, отказы и время выполнения (с ожиданием в очереди)
+        """
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "latency": self.latency.snapshot(),
+        }
+
+
+hash_executor = HashExecutor(
+    workers=setting.hashing.workers, max_queue=setting.hashing.max_queue
+)
@@ -1,10 +1,21 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
 
 import bcrypt
 import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey, RSAPublicKey
 from fastapi import Response
 
 from src.core.config import COOKIE_NAME, setting
+from src.core.hash_executor import hash_executor
+from src.core.ttl_cache import TTLCache
+
+# кеш уже проверенных токенов: sha256(token) -> payload, запись живет до exp токена
+token_cache = TTLCache(maxsize=setting.auth_jwt.token_cache_size, ttl=0)
 
 
 def create_hash_password(password: str) -> bytes:
@@ -39,44 +50,98 @@ def validate_password(
     )
 
 
+async def create_hash_password_async(password: str) -> bytes:
+    """
+    Создание хеш пароля в пуле потоков hash_executor (не блокирует event loop)
+    :raise ExceptBusy:
+        если пул перегружен
+    """
+    return await hash_executor.run(create_hash_password, password)
+
+
+async def validate_password_async(password: str, hashed_password: bytes) -> bool:
+    """
+    Проверка пароля в пуле потоков hash_executor (не блокирует event loop)
+    :raise ExceptBusy:
+        если пул перегружен
+    """
+    return await hash_executor.run(validate_password, password, hashed_password)
+
+
+@lru_cache
+def load_private_key() -> RSAPrivateKey:
+    """
+    Загружает приватный ключ из PEM-файла один раз за время жизни процесса
+    """
+    return serialization.load_pem_private_key(
+        setting.auth_jwt.private_key_path.read_bytes(), password=None
+    )
+
+
+@lru_cache
+def load_public_key() -> RSAPublicKey:
+    """
+    Загружает открытый ключ из PEM-файла один раз за время жизни процесса
+    """
+    return serialization.load_pem_public_key(
+        setting.auth_jwt.public_key_path.read_bytes()
+    )
+
+
 def encode_jwt(
     payload: dict,
-    private_key: str = setting.auth_jwt.private_key_path.read_text(),
+    private_key: str | RSAPrivateKey | None = None,
     algorithm: str = setting.auth_jwt.algorithm,
 ):
     """
      Создает jwt-токена по алгоритму RS256 (с использованием ассиметричных ключей)
     :param payload: dict
         содержание jwt-токена
-    :param private_key: str
-        приватный ключ
+    :param private_key: str | RSAPrivateKey | None
+        приватный ключ, по умолчанию ключ из настроек
     :param algorithm: str
         задается алгоритм
     :return:
         возвращает jwt-токен
     """
+    if private_key is None:
+        private_key = load_private_key()
     encoded = jwt.encode(payload, private_key, algorithm=algorithm)
     return encoded
 
 
 def decode_jwt(
     token: str | bytes,
-    public_key: str = setting.auth_jwt.public_key_path.read_text(),
+    public_key: str | RSAPublicKey | None = None,
     algorithm: str = setting.auth_jwt.algorithm,
 ):
     """
-        Раскодирует jwt-токен
+        Раскодирует jwt-токен. Токены, проверенные ключом из настроек, кешируются
+        до истечения срока их действия (exp)
     :param token: str | bytes
         jwt-токен
-    :param public_key: str
-        открытый ключ шифрования
+    :param public_key: str | RSAPublicKey | None
+        открытый ключ шифрования, по умолчанию ключ из настроек
     :param algorithm: str
         алгоритм шифрования
     :return:
-        ?? содержание токена (payload)
+        содержание токена (payload)
     """
-    decoded = jwt.decode(token, public_key, algorithms=[algorithm])
-    return decoded
+    if public_key is not None:
+        return jwt.decode(token, public_key, algorithms=[algorithm])
+
+    raw: bytes = token.encode() if isinstance(token, str) else token
+    digest: bytes = hashlib.sha256(raw).digest()
+    cached: Optional[dict] = token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+
+    decoded = jwt.decode(token, load_public_key(), algorithms=[algorithm])
+    if "exp" in decoded:
+        ttl: float = decoded["exp"] - time.time()
+        if ttl > 0:
+            token_cache.set(digest, decoded, ttl=ttl)
+    return dict(decoded)
 
 
 def set_cookie(
@@ -0,0 +1,145 @@
+"""
+Настройка логирования: запись в поток вынесена из event loop.
+
+Обработчик корня - QueueHandler: в вызывающем потоке запись только дополняется
+request_id и ставится в очередь, форматирование в JSON и вывод выполняет
+QueueListener в отдельном потоке. Сообщения уровня ниже WARNING логгеров из
+setting.logging.sampling пропускаются с заданной долей (горячие пути).
+
+setup_logging вызывается один раз при старте процесса (lifespan приложения,
+воркер Celery, служебные команды); модули только получают логгер через
+logging.getLogger(__name__).
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from src.core.config import setting
+
+TEXT_FORMAT = (
+    "[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(levelname)-7s "
+    "%(request_id)s - %(message)s"
+)
+
+# id текущего HTTP-запроса (RequestIdMiddleware), попадает во все его записи
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю записей ниже WARNING логгеров из sampling (и их потомков)
+    """
+
+    def __init__(self, sampling: dict[str, float]) -> None:
+        super().__init__()
+        self.sampling = sampling
+
+    def rate(self, name: str) -> float:
+        while name:
+            if name in self.sampling:
+                return self.sampling[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate(record.name)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LogQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Сообщение и трассировка исключения формируются до постановки в очередь
+        (аргументы могут измениться), форматирование записи - в потоке вывода
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging() -> QueueListener:
+    """
+        Настраивает корневой логгер (повторный вызов в том же процессе ничего не
+        меняет, в дочернем процессе после fork поток вывода запускается заново)
+    :return: QueueListener
+        поток вывода записей
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return _listener
+
+    stream = logging.StreamHandler()
+    if setting.logging.json_format:
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = LogQueueHandler(records)
+    handler.addFilter(SamplingFilter(setting.logging.sampling))
+    handler.addFilter(RequestIdFilter())
+
+    root: logging.Logger = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(setting.logging.level)
+
+    _listener = QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """
+    Выводит оставшиеся в очереди записи и останавливает поток вывода
+    """
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
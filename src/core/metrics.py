@@ -0,0 +1,214 @@
+"""
+Метрики Prometheus: HTTP-запросы (MetricsMiddleware), запросы к БД (события Engine),
+кеш пользователей, пул потоков bcrypt и пулы соединений с БД.
+
+При запуске под gunicorn с несколькими воркерами задается переменная окружения
+PROMETHEUS_MULTIPROC_DIR (см. docker/app.sh): каждый воркер пишет значения
+в свои файлы каталога, /metrics агрегирует их по всем воркерам.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry,
+                               Counter, Gauge, Histogram, generate_latest,
+                               multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route"],
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests in progress",
+    multiprocess_mode="livesum",
+)
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency",
+)
+
+WS_CONNECTIONS = Gauge(
+    "ws_connections",
+    "Open WebSocket connections",
+    multiprocess_mode="livesum",
+)
+WS_DROPPED = Counter(
+    "ws_dropped_total",
+    "WebSocket connections dropped as slow consumers",
+)
+
+USER_CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total",
+    "Lookups in the per-worker user cache",
+    ["result"],
+)
+HASH_PENDING = Gauge(
+    "hash_executor_pending",
+    "bcrypt tasks running or waiting in the queue",
+    multiprocess_mode="livesum",
+)
+HASH_REJECTED = Counter(
+    "hash_executor_rejected_total",
+    "bcrypt tasks rejected because the queue was full",
+)
+HASH_LATENCY = Histogram(
+    "hash_executor_duration_seconds",
+    "bcrypt task latency including the wait in the queue",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections checked out from the pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time to get a connection from the pool",
+    ["engine"],
+)
+DB_POOL_OVERFLOW = Counter(
+    "db_pool_overflow_total",
+    "Connections opened beyond pool_size",
+    ["engine"],
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Pool checkouts that timed out",
+    ["engine"],
+)
+
+RATE_LIMITED = Counter(
+    "http_rate_limited_total",
+    "Requests rejected by rate limiting",
+    ["rule", "source"],
+)
+
+
+class QueryTracker:
+    """
+    SQL-запросы одного HTTP-запроса (или блока track_queries)
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        # текст запроса с плейсхолдерами параметров - "форма" запроса
+        self.shapes: dict[str, int] = dict()
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, num) for shape, num in self.shapes.items() if num >= threshold]
+
+    def problems(self, budget: Optional[int], repeat_threshold: int) -> list[str]:
+        """
+        Нарушения: превышение бюджета и повторяющиеся запросы (src.core.query_budget)
+        """
+        result: list[str] = list()
+        if budget is not None and self.count > budget:
+            result.append(f"{self.count} queries, budget {budget}")
+        for shape, num in self.repeated(repeat_threshold):
+            result.append(f"possible N+1, {num} x {shape.splitlines()[0][:200]}")
+        return result
+
+
+# запросы к БД текущего HTTP-запроса (изменяемый объект, чтобы записи были видны
+# из контекстов, скопированных при вызове зависимостей)
+request_queries: ContextVar[Optional[QueryTracker]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+# время начала хранится в контексте выполнения: при ошибке запроса after_cursor_execute
+# не вызывается, и значение уходит вместе с контекстом, не оставаясь на соединении
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start: Optional[float] = getattr(context, "_query_start", None)
+    if start is not None:
+        QUERY_LATENCY.observe(time.perf_counter() - start)
+    tracker: Optional[QueryTracker] = request_queries.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def route_label(scope: Scope) -> str:
+    """
+    Шаблон пути маршрута (/posts/{id}), чтобы число рядов метрик не зависело от id
+    """
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """
+    Число, длительность и запросы к БД HTTP-запросов по маршрутам
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code: int = 500
+        tracker = QueryTracker()
+        token = request_queries.set(tracker)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc()
+        start: float = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed: float = time.perf_counter() - start
+            IN_PROGRESS.dec()
+            request_queries.reset(token)
+            route: str = route_label(scope)
+            REQUESTS.labels(scope["method"], route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(scope["method"], route).observe(elapsed)
+            REQUEST_QUERIES.labels(route).observe(tracker.count)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+        Метрики в текстовом формате Prometheus
+    :return: tuple[bytes, str]
+        тело ответа и Content-Type
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
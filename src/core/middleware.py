@@ -0,0 +1,72 @@
+import re
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import PRIMARY_COOKIE_NAME, setting
+from src.core.log import request_id
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# id от клиента или nginx принимается, только если похож на идентификатор
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class RequestIdMiddleware:
+    """
+    Id запроса (из заголовка X-Request-ID или новый) для всех записей лога
+    обработки запроса (src.core.log) и в заголовке ответа
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        value: str = Headers(scope=scope).get(REQUEST_ID_HEADER, "")
+        if not REQUEST_ID_PATTERN.fullmatch(value):
+            value = uuid.uuid4().hex
+        token = request_id.set(value)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(REQUEST_ID_HEADER, value)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Если запрос зафиксировал транзакцию в основной БД (request.state.db_committed,
+    см. get_async_session), ответ устанавливает короткоживущую cookie, и следующие
+    запросы пользователя на чтение идут в основную БД, а не в отстающую реплику
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and scope.get(
+                "state", {}
+            ).get("db_committed"):
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE_NAME}=1; "
+                    f"Max-Age={setting.db.replica_sticky_seconds}; Path=/; HttpOnly",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,124 @@
+"""
+Инструментирование пула соединений SQLAlchemy.
+
+Число выданных соединений, подключения сверх pool_size (overflow) и таймауты
+собираются через события пула. Событие "до ожидания соединения" в SQLAlchemy
+отсутствует, поэтому время ожидания измеряет InstrumentedQueuePool.connect.
+Значения дублируются в метрики Prometheus с меткой engine (src.core.metrics).
+"""
+
+import logging
+import time
+from typing import Any, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from src.core.metrics import (DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_TIMEOUTS,
+                              DB_POOL_WAIT)
+from src.core.stats import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """
+    Счетчики пула соединений одного engine
+    """
+
+    def __init__(self, name: str = "primary") -> None:
+        # метка engine в метриках Prometheus
+        self.name = name
+        self.checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.wait = Histogram()
+
+    def stats(self, pool: Optional[Pool] = None) -> dict:
+        result: dict[str, Any] = {
+            "checked_out": self.checked_out,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "wait_seconds": self.wait.snapshot(),
+        }
+        if isinstance(pool, QueuePool):
+            result.update(size=pool.size(), overflow=pool.overflow())
+        return result
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул asyncio-драйверов с замером времени получения соединения
+    """
+
+    pool_stats: Optional[PoolStats] = None
+
+    def connect(self):
+        start: float = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.pool_stats is not None:
+                self.pool_stats.timeouts += 1
+                DB_POOL_TIMEOUTS.labels(self.pool_stats.name).inc()
+            logger.warning("Connection pool timeout, %s", self.status())
+            raise
+        finally:
+            if self.pool_stats is not None:
+                elapsed: float = time.perf_counter() - start
+                self.pool_stats.wait.observe(elapsed)
+                DB_POOL_WAIT.labels(self.pool_stats.name).observe(elapsed)
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # engine.dispose() создает новый пул, счетчики сохраняются
+        pool = super().recreate()
+        pool.pool_stats = self.pool_stats
+        return pool
+
+
+def instrument_engine(engine: AsyncEngine, name: str = "primary") -> PoolStats:
+    """
+        Подключает счетчики к пулу engine (события переносятся и в пересозданный пул)
+    :param engine: AsyncEngine
+        engine БД
+    :param name: str
+        имя engine в метриках Prometheus
+    :return: PoolStats
+        счетчики пула
+    """
+    stats = PoolStats(name)
+    pool: Pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.pool_stats = stats
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record) -> None:
+        stats.connects += 1
+        current: Pool = engine.sync_engine.pool
+        if isinstance(current, QueuePool) and current.overflow() > 0:
+            stats.overflow_events += 1
+            DB_POOL_OVERFLOW.labels(name).inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        stats.checked_out += 1
+        stats.checkouts += 1
+        DB_POOL_CHECKED_OUT.labels(name).inc()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        stats.checked_out -= 1
+        DB_POOL_CHECKED_OUT.labels(name).dec()
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        stats.invalidations += 1
+
+    return stats
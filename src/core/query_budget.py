@@ -0,0 +1,86 @@
+"""
+Бюджет SQL-запросов на HTTP-запрос и поиск N+1.
+
+Включается настройкой setting.query_budget.enabled. SQL-запросы учитываются
+в QueryTracker из src.core.metrics (тот же, что у MetricsMiddleware; если ее нет,
+QueryBudgetMiddleware создает свой). После обработки число запросов сравнивается
+с бюджетом маршрута (декоратор query_budget), а одинаковые запросы, повторенные
+repeat_threshold и более раз, считаются признаком N+1.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.config import setting
+from src.core.exceptions import ExceptQueryBudget
+from src.core.metrics import QueryTracker, request_queries
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """
+    Учет SQL-запросов внутри блока (для тестов и бенчмарков)
+    """
+    tracker = QueryTracker()
+    token = request_queries.set(tracker)
+    try:
+        yield tracker
+    finally:
+        request_queries.reset(token)
+
+
+def query_budget(budget: int) -> Callable[[F], F]:
+    """
+    Декоратор эндпоинта: допустимое число SQL-запросов на HTTP-запрос
+    """
+
+    def decorator(func: F) -> F:
+        func.__query_budget__ = budget
+        return func
+
+    return decorator
+
+
+def route_budget(scope: Scope) -> Optional[int]:
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    return getattr(endpoint, "__query_budget__", setting.query_budget.default_budget)
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверка бюджета SQL-запросов маршрута (при setting.query_budget.enabled)
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not setting.query_budget.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        # запросы уже учитывает MetricsMiddleware, если она подключена снаружи
+        tracker: Optional[QueryTracker] = request_queries.get()
+        if tracker is None:
+            with track_queries() as tracker:
+                await self.app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+        problems: list[str] = tracker.problems(
+            route_budget(scope), setting.query_budget.repeat_threshold
+        )
+        if not problems:
+            return
+        route: str = getattr(scope.get("route"), "path", scope["path"])
+        message: str = f"{scope['method']} {route}: " + "; ".join(problems)
+        if setting.query_budget.mode == "raise":
+            raise ExceptQueryBudget(message)
+        logger.warning("Query budget exceeded, %s", message)
@@ -0,0 +1,134 @@
+"""
+Ограничение частоты запросов (token bucket в Redis).
+
+Корзина клиента хранится в хеше Redis и пополняется со скоростью rate до burst
+токенов; проверка и списание токена выполняются одним Lua-скриптом, поэтому
+атомарны для всех воркеров. Время берется с сервера Redis (TIME), часы воркеров
+не влияют на результат. Отклоненный клиент запоминается в процессе до момента,
+когда у него появится токен: повторные запросы отклоняются без обращения к Redis.
+Если Redis недоступен, запросы пропускаются.
+
+Правила маршрутов задаются в setting.rate_limit.rules, зависимость:
+    @router.post("/login", dependencies=[Depends(RateLimit("login"))])
+"""
+
+import logging
+import math
+import time
+from typing import Optional
+
+import jwt
+from fastapi import Request, status
+from fastapi.exceptions import HTTPException
+from redis.exceptions import RedisError
+
+from src.core.config import COOKIE_NAME, RateLimitRule, setting
+from src.core.jwt_utils import decode_jwt
+from src.core.metrics import RATE_LIMITED
+from src.core.redis_client import get_redis
+from src.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_PREFIX = "rate-limit"
+
+# KEYS[1] - корзина, ARGV[1] - токенов в секунду, ARGV[2] - емкость корзины;
+# возвращает {1, 0} или {0, мс до появления токена}
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate))
+return {allowed, retry_after}
+"""
+
+# ключ корзины -> время (time.monotonic), когда у клиента появится токен
+deny_cache = TTLCache(maxsize=setting.rate_limit.deny_cache_size, ttl=1)
+
+
+async def take_token(key: str, rule: RateLimitRule) -> Optional[float]:
+    """
+        Списывает токен из корзины
+    :param key: str
+        ключ корзины
+    :param rule: RateLimitRule
+        правило маршрута
+    :return: Optional[float]
+        None, если запрос разрешен, иначе через сколько секунд появится токен
+    :raise RedisError:
+        если Redis недоступен
+    """
+    allowed, retry_after_ms = await get_redis().eval(
+        TOKEN_BUCKET_SCRIPT, 1, key, rule.rate, rule.burst
+    )
+    if allowed:
+        return None
+    return int(retry_after_ms) / 1000
+
+
+def client_identity(request: Request, rule: RateLimitRule) -> str:
+    if rule.per == "user":
+        token: Optional[str] = request.cookies.get(COOKIE_NAME)
+        if token is not None:
+            try:
+                return f"user:{decode_jwt(token)['sub']}"
+            except (jwt.InvalidTokenError, KeyError):
+                pass
+    host: str = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests, try later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimit:
+    """
+    Зависимость FastAPI: ограничение частоты запросов по правилу name
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    async def __call__(self, request: Request) -> None:
+        rule: Optional[RateLimitRule] = setting.rate_limit.rules.get(self.name)
+        if not setting.rate_limit.enabled or rule is None:
+            return
+        key: str = f"{RATE_LIMIT_PREFIX}:{self.name}:{client_identity(request, rule)}"
+
+        denied_until: Optional[float] = deny_cache.get(key)
+        if denied_until is not None:
+            RATE_LIMITED.labels(self.name, "local").inc()
+            raise too_many_requests(denied_until - time.monotonic())
+
+        try:
+            retry_after: Optional[float] = await take_token(key, rule)
+        except RedisError:
+            logger.warning("Error check rate limit %s, request allowed", self.name)
+            return
+        if retry_after is not None:
+            deny_cache.set(key, time.monotonic() + retry_after, ttl=retry_after)
+            RATE_LIMITED.labels(self.name, "redis").inc()
+            raise too_many_requests(retry_after)
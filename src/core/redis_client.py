@@ -0,0 +1,62 @@
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+
+from src.core.config import setting_conn
+
+# клиенты по значению decode_responses: строки для приложения, байты для fastapi-cache
+_clients: dict[bool, aioredis.Redis] = dict()
+# синхронный клиент для задач Celery
+_sync_client: Optional[redis.Redis] = None
+
+
+def _redis_url() -> str:
+    return f"redis://{setting_conn.REDIS_HOST}:{setting_conn.REDIS_PORT}"
+
+
+def get_redis(decode_responses: bool = True) -> aioredis.Redis:
+    """
+        Возвращает общий для процесса асинхронный клиент Redis (создается при первом вызове)
+    :param decode_responses: bool
+        True - ответы декодируются в str, False - возвращаются bytes
+        (требуется для RedisBackend fastapi-cache)
+    :return: aioredis.Redis
+        клиент Redis
+    """
+    client: Optional[aioredis.Redis] = _clients.get(decode_responses)
+    if client is None:
+        client = aioredis.from_url(
+            _redis_url(),
+            encoding="utf8",
+            decode_responses=decode_responses,
+        )
+        _clients[decode_responses] = client
+    return client
+
+
+def set_redis(client: aioredis.Redis, decode_responses: bool = True) -> None:
+    """
+    Подменяет клиент Redis (используется в тестах и бенчмарках)
+    """
+    _clients[decode_responses] = client
+
+
+def get_sync_redis() -> redis.Redis:
+    """
+    Возвращает синхронный клиент Redis (для задач Celery), ответы декодируются в str
+    """
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(
+            _redis_url(), encoding="utf8", decode_responses=True
+        )
+    return _sync_client
+
+
+def set_sync_redis(client: redis.Redis) -> None:
+    """
+    Подменяет синхронный клиент Redis (используется в тестах и бенчмарках)
+    """
+    global _sync_client
+    _sync_client = client
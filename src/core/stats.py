@@ -0,0 +1,45 @@
+import bisect
+from typing import Sequence
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class Histogram:
+    """
+    Гистограмма значений (например, длительности операций в секундах) в пределах процесса
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # последний элемент - значения больше верхней границы (+Inf)
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        """
+        Накопленные значения по верхним границам интервалов (как в Prometheus)
+        """
+        cumulative: dict[str, int] = dict()
+        total = 0
+        for bound, num in zip(self.buckets, self.counts):
+            total += num
+            cumulative[str(bound)] = total
+        cumulative["+Inf"] = self.count
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
@@ -1,37 +1,50 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 import uvicorn
-from fastapi import Depends, FastAPI, Request
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from redis import asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.config import configure_logging, templates, setting_conn
-from src.core.database import get_async_session
-from src.posts.crud import get_post_with_user_from_db
+from src.core.config import templates
+from src.core.database import (async_session_maker, get_read_session,
+                               replica_session_makers)
+from src.core.exceptions import ExceptCursor
+from src.core.log import setup_logging, stop_logging
+from src.core.metrics import MetricsMiddleware, render_metrics
+from src.core.middleware import ReadYourWritesMiddleware, RequestIdMiddleware
+from src.core.query_budget import QueryBudgetMiddleware, query_budget
+from src.core.redis_client import get_redis
+from src.messages.routes import router as router_messages
+from src.posts.fragments import index_response
+from src.posts.realtime import listen_events
 from src.posts.routes import router as router_posts
-from src.posts.schemas import PostWithAutor
+from src.tasks.outbox import run_outbox_relay
+from src.users.cache import listen_user_invalidation
 from src.users.routers import router as router_users
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    # redis = aioredis.from_url("redis://localhost")
-    redis = aioredis.from_url(
-        f"redis://{setting_conn.REDIS_HOST}:{setting_conn.REDIS_PORT}",
-        encoding="utf8",
-        decode_responses=True,
+    setup_logging()
+    FastAPICache.init(
+        RedisBackend(get_redis(decode_responses=False)), prefix="fastapi-cache"
     )
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    listener: asyncio.Task = asyncio.create_task(listen_user_invalidation())
+    relay: asyncio.Task = asyncio.create_task(run_outbox_relay(async_session_maker))
+    events: asyncio.Task = asyncio.create_task(listen_events())
     yield
+    events.cancel()
+    relay.cancel()
+    listener.cancel()
+    stop_logging()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -56,21 +69,44 @@ app.add_middleware(
     ],
 )
 
+if replica_session_makers:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
 
 app.include_router(router_users)
 app.include_router(router_posts)
+app.include_router(router_messages)
 
 
 @app.get("/", name="main:index", response_class=HTMLResponse)
+@query_budget(2)
 async def main_index(
-    request: Request, session: AsyncSession = Depends(get_async_session)
-) -> HTMLResponse:
-    posts: list[PostWithAutor] = await get_post_with_user_from_db(session=session)
-    return templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={"posts": posts},
-    )
+    request: Request,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    try:
+        return await index_response(request, session, cursor=cursor, conditional=True)
+    except ExceptCursor:
+        return templates.TemplateResponse(
+            request=request,
+            name="error.html",
+            context={
+                "title_error": "Проблема c выводом постов",
+                "text_error": "Неверный курсор страницы",
+            },
+            status_code=400,
+        )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
 
 
 if __name__ == "__main__":
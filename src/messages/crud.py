@@ -0,0 +1,264 @@
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import desc, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import setting
+from src.core.exceptions import (ExceptDB, ExceptUser, NotFindConversation,
+                                 NotFindUser)
+from src.messages.models import Conversation, Message, Participant
+from src.messages.schemas import (ConversationInbox, ConversationRead,
+                                  MessagePage, MessageRead)
+from src.messages.unread import get_unread, increment_unread, reset_unread
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+def direct_key(members: list[int]) -> Optional[str]:
+    """
+    Ключ диалога двух пользователей (у групп None)
+    """
+    if len(members) != 2:
+        return None
+    return f"{members[0]}:{members[1]}"
+
+
+async def create_conversation(
+    session: AsyncSession, id_user: int, participants: list[int]
+) -> ConversationRead:
+    """
+        Создает диалог или группу; для двух пользователей возвращает существующий диалог
+    :param session: AsyncSession
+        сессия БД
+    :param id_user: int
+        id создателя диалога
+    :param participants: list[int]
+        id остальных участников
+    :return: ConversationRead
+        диалог
+    :raise ExceptUser:
+        если участников меньше двух или больше setting.messages.max_participants
+    :raise NotFindUser:
+        если кого-то из участников нет в БД
+    """
+    members: list[int] = sorted(set(participants) | {id_user})
+    if not 2 <= len(members) <= setting.messages.max_participants:
+        raise ExceptUser(f"Invalid number of participants {len(members)}")
+    found: int = await session.scalar(
+        select(func.count(User.id)).where(User.id.in_(members))
+    )
+    if found != len(members):
+        raise NotFindUser("Participant not found")
+
+    key: Optional[str] = direct_key(members)
+    if key is not None:
+        existing: Optional[Conversation] = await session.scalar(
+            select(Conversation).where(Conversation.direct_key == key)
+        )
+        if existing is not None:
+            return ConversationRead(
+                id=existing.id,
+                participants=members,
+                last_message_id=existing.last_message_id,
+            )
+
+    conversation: Conversation = Conversation(direct_key=key)
+    try:
+        session.add(conversation)
+        await session.flush()
+        await session.execute(
+            insert(Participant),
+            [
+                {"conversation_id": conversation.id, "user_id": member}
+                for member in members
+            ],
+        )
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        if key is None:
+            # у группы нет direct_key, искать параллельно созданную нечего
+            logger.exception("Error create conversation")
+            raise ExceptDB("Error in DB")
+        # диалог этой пары создан параллельным запросом
+        existing = await session.scalar(
+            select(Conversation).where(Conversation.direct_key == key)
+        )
+        if existing is None:
+            logger.exception("Error create conversation")
+            raise ExceptDB("Error in DB")
+        conversation = existing
+    except SQLAlchemyError:
+        logger.exception("Error create conversation")
+        await session.rollback()
+        raise ExceptDB("Error in DB")
+    return ConversationRead(
+        id=conversation.id,
+        participants=members,
+        last_message_id=conversation.last_message_id,
+    )
+
+
+async def get_conversations(
+    session: AsyncSession, id_user: int
+) -> list[ConversationInbox]:
+    """
+        Диалоги пользователя с числом непрочитанных сообщений, новые сверху
+    :param session: AsyncSession
+        сессия БД
+    :param id_user: int
+        id пользователя
+    :return: list[ConversationInbox]
+        список диалогов
+    """
+    stmt = (
+        select(Conversation.id, Conversation.last_message_id)
+        .join(Participant, Participant.conversation_id == Conversation.id)
+        .where(Participant.user_id == id_user)
+        .order_by(desc(Conversation.last_message_id).nulls_last(), desc(Conversation.id))
+    )
+    rows = (await session.execute(stmt)).all()
+    try:
+        unread: dict[int, int] = await get_unread(id_user)
+    except RedisError:
+        logger.warning("Error get unread counters of user %d", id_user)
+        unread = dict()
+    return [
+        ConversationInbox(
+            id=row.id,
+            last_message_id=row.last_message_id,
+            unread=unread.get(row.id, 0),
+        )
+        for row in rows
+    ]
+
+
+async def check_participant(
+    session: AsyncSession, conversation_id: int, id_user: int
+) -> None:
+    """
+    :raise NotFindConversation:
+        если диалога нет или пользователь в нем не участвует
+    """
+    participant: Optional[Participant] = await session.get(
+        Participant, (conversation_id, id_user)
+    )
+    if participant is None:
+        raise NotFindConversation(f"Conversation {conversation_id} not found")
+
+
+async def get_messages(
+    session: AsyncSession,
+    conversation_id: int,
+    id_user: int,
+    cursor: Optional[int] = None,
+    limit: int = setting.pagination.page_size,
+) -> MessagePage:
+    """
+        Страница истории диалога, новые сообщения сверху (keyset-пагинация по id)
+    :param session: AsyncSession
+        сессия БД
+    :param conversation_id: int
+        id диалога
+    :param id_user: int
+        id пользователя, должен быть участником диалога
+    :param cursor: Optional[int] = None
+        next_cursor предыдущей страницы, по умолчанию первая страница
+    :param limit: int
+        размер страницы, ограничивается setting.pagination.max_page_size
+    :return: MessagePage
+        сообщения и курсор следующей страницы
+    :raise NotFindConversation:
+        если диалога нет или пользователь в нем не участвует
+    """
+    await check_participant(session, conversation_id, id_user)
+    limit = min(max(limit, 1), setting.pagination.max_page_size)
+    stmt = (
+        select(Message.id, Message.id_user, Message.body, Message.date_creation)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(desc(Message.id))
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(Message.id < cursor)
+    rows = (await session.execute(stmt)).all()
+
+    next_cursor: Optional[int] = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return MessagePage(
+        messages=[MessageRead.model_validate(row) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+async def add_message(
+    session: AsyncSession, conversation_id: int, id_user: int, body: str
+) -> MessageRead:
+    """
+        Добавляет сообщение в диалог и увеличивает счетчики непрочитанных
+        остальных участников
+    :param session: AsyncSession
+        сессия БД
+    :param conversation_id: int
+        id диалога
+    :param id_user: int
+        id автора, должен быть участником диалога
+    :param body: str
+        текст сообщения
+    :return: MessageRead
+        сообщение
+    :raise NotFindConversation:
+        если диалога нет или пользователь в нем не участвует
+    """
+    members: list[int] = list(
+        await session.scalars(
+            select(Participant.user_id).where(
+                Participant.conversation_id == conversation_id
+            )
+        )
+    )
+    if id_user not in members:
+        raise NotFindConversation(f"Conversation {conversation_id} not found")
+    try:
+        res = await session.execute(
+            insert(Message)
+            .values(conversation_id=conversation_id, id_user=id_user, body=body)
+            .returning(Message.id, Message.id_user, Message.body, Message.date_creation)
+        )
+        message: MessageRead = MessageRead.model_validate(res.one())
+        await session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(last_message_id=message.id)
+        )
+        await session.commit()
+    except SQLAlchemyError:
+        logger.exception("Error add message")
+        await session.rollback()
+        raise ExceptDB("Error in DB")
+
+    try:
+        await increment_unread(
+            conversation_id, [member for member in members if member != id_user]
+        )
+    except RedisError:
+        logger.warning(
+            "Error increment unread counters of conversation %d", conversation_id
+        )
+    return message
+
+
+async def mark_read(session: AsyncSession, conversation_id: int, id_user: int) -> None:
+    """
+        Сбрасывает счетчик непрочитанных сообщений диалога
+    :raise NotFindConversation:
+        если диалога нет или пользователь в нем не участвует
+    """
+    await check_participant(session, conversation_id, id_user)
+    await reset_unread(id_user, conversation_id)
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class Conversation(Base):
+    """
+    Диалог двух пользователей или небольшая группа
+    """
+
+    __tablename__ = "conversations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # "min_id:max_id" для диалога двух пользователей (один диалог на пару), у групп NULL
+    direct_key: Mapped[Optional[str]] = mapped_column(String(50), unique=True)
+    # id последнего сообщения: сортировка списка диалогов без чтения сообщений
+    last_message_id: Mapped[Optional[int]]
+    date_creation: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+
+
+class Participant(Base):
+    __tablename__ = "participants"
+    __table_args__ = (
+        # список диалогов пользователя
+        Index("ix_participants_user_id_conversation_id", "user_id", "conversation_id"),
+    )
+
+    conversation_id: Mapped[int] = mapped_column(
+        ForeignKey("conversations.id"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+
+
+class Message(Base):
+    __tablename__ = "messages"
+    __table_args__ = (
+        # история диалога - диапазон индекса (conversation_id, id)
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    conversation_id: Mapped[int] = mapped_column(ForeignKey("conversations.id"))
+    id_user: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    body: Mapped[str] = mapped_column(Text)
+    date_creation: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
@@ -0,0 +1,146 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Path, Query, status
+from fastapi.exceptions import HTTPException
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import setting
+from src.core.database import get_async_session, get_read_session
+from src.core.exceptions import (ExceptDB, ExceptUser, NotFindConversation,
+                                 NotFindUser)
+from src.core.query_budget import query_budget
+from src.messages.crud import (add_message, create_conversation,
+                               get_conversations, get_messages, mark_read)
+from src.messages.schemas import (ConversationCreate, ConversationInbox,
+                                  ConversationRead, MessageCreate, MessagePage,
+                                  MessageRead, UnreadCounts)
+from src.messages.unread import get_unread
+from src.users.depends import current_active_user
+from src.users.models import User
+
+router = APIRouter(prefix="/messages", tags=["Message"])
+
+
+def conversation_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+    )
+
+
+@router.post(
+    "/conversations",
+    status_code=status.HTTP_201_CREATED,
+    response_class=JSONResponse,
+)
+@query_budget(5)
+async def new_conversation(
+    conversation: ConversationCreate,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    try:
+        res: ConversationRead = await create_conversation(
+            session, id_user=user.id, participants=conversation.participants
+        )
+    except ExceptUser:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid number of participants",
+        )
+    except NotFindUser:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Participant not found"
+        )
+    except ExceptDB:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error BD")
+    return res
+
+
+@router.get("/conversations", response_class=JSONResponse)
+@query_budget(2)
+async def list_conversations(
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    conversations: list[ConversationInbox] = await get_conversations(session, user.id)
+    return conversations
+
+
+@router.get("/unread", response_class=JSONResponse)
+@query_budget(1)
+async def unread_counts(user: User = Depends(current_active_user)):
+    """
+    Непрочитанные сообщения по диалогам (из Redis, без чтения сообщений)
+    """
+    try:
+        counts: dict[int, int] = await get_unread(user.id)
+    except RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unread counters unavailable",
+        )
+    return UnreadCounts(total=sum(counts.values()), conversations=counts)
+
+
+@router.get("/conversations/{id}", response_class=JSONResponse)
+@query_budget(3)
+async def conversation_history(
+    id: Annotated[int, Path(gt=0)],
+    cursor: Annotated[Optional[int], Query(gt=0)] = None,
+    limit: Annotated[
+        int, Query(gt=0, le=setting.pagination.max_page_size)
+    ] = setting.pagination.page_size,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    try:
+        page: MessagePage = await get_messages(
+            session, conversation_id=id, id_user=user.id, cursor=cursor, limit=limit
+        )
+    except NotFindConversation:
+        raise conversation_not_found()
+    return page
+
+
+@router.post(
+    "/conversations/{id}",
+    status_code=status.HTTP_201_CREATED,
+    response_class=JSONResponse,
+)
+@query_budget(4)
+async def send_message(
+    id: Annotated[int, Path(gt=0)],
+    message: MessageCreate,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    try:
+        res: MessageRead = await add_message(
+            session, conversation_id=id, id_user=user.id, body=message.body
+        )
+    except NotFindConversation:
+        raise conversation_not_found()
+    except ExceptDB:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error BD")
+    return res
+
+
+@router.post("/conversations/{id}/read", response_class=JSONResponse)
+@query_budget(2)
+async def read_conversation(
+    id: Annotated[int, Path(gt=0)],
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    try:
+        await mark_read(session, conversation_id=id, id_user=user.id)
+    except NotFindConversation:
+        raise conversation_not_found()
+    except RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unread counters unavailable",
+        )
+    return {"result": True}
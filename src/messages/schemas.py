@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.core.config import setting
+
+
+class ConversationCreate(BaseModel):
+    # участники кроме текущего пользователя
+    participants: list[int] = Field(
+        min_length=1, max_length=setting.messages.max_participants - 1
+    )
+
+
+class ConversationRead(BaseModel):
+    id: int
+    participants: list[int]
+    last_message_id: Optional[int] = None
+
+
+class ConversationInbox(BaseModel):
+    id: int
+    last_message_id: Optional[int] = None
+    unread: int = 0
+
+
+class MessageCreate(BaseModel):
+    body: str = Field(min_length=1, max_length=setting.messages.max_length)
+
+
+class MessageRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    id_user: int
+    body: str
+    date_creation: datetime
+
+
+class MessagePage(BaseModel):
+    messages: list[MessageRead]
+    # id, с которого (не включая) читать более старые сообщения
+    next_cursor: Optional[int] = None
+
+
+class UnreadCounts(BaseModel):
+    total: int
+    conversations: dict[int, int]
@@ -0,0 +1,47 @@
+"""
+Счетчики непрочитанных сообщений в Redis.
+
+У каждого пользователя хеш unread:<id_user> с полями id диалогов: отправка
+сообщения увеличивает счетчики остальных участников, прочтение диалога удаляет
+поле. Список диалогов и общее число непрочитанных читаются одной командой,
+без подсчета сообщений в БД.
+"""
+
+from typing import Iterable
+
+from src.core.redis_client import get_redis
+
+UNREAD_PREFIX = "unread"
+
+
+def unread_key(id_user: int) -> str:
+    return f"{UNREAD_PREFIX}:{id_user}"
+
+
+async def increment_unread(conversation_id: int, users: Iterable[int]) -> None:
+    """
+        Новое сообщение в диалоге для пользователей users
+    :raise RedisError:
+        если Redis недоступен
+    """
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for id_user in users:
+            pipe.hincrby(unread_key(id_user), str(conversation_id), 1)
+        await pipe.execute()
+
+
+async def reset_unread(id_user: int, conversation_id: int) -> None:
+    """
+    Пользователь прочитал диалог
+    """
+    await get_redis().hdel(unread_key(id_user), str(conversation_id))
+
+
+async def get_unread(id_user: int) -> dict[int, int]:
+    """
+        Непрочитанные сообщения пользователя
+    :return: dict[int, int]
+        id диалога и число непрочитанных сообщений (только ненулевые)
+    """
+    counts: dict[str, str] = await get_redis().hgetall(unread_key(id_user))
+    return {int(conversation_id): int(count) for conversation_id, count in counts.items()}
@@ -1,40 +1,89 @@
 import logging
-from typing import Optional
+import re
+from typing import Any, AsyncIterator, Optional
 
-from sqlalchemy import desc, select
-from sqlalchemy.engine import Result
+from sqlalchemy import (and_, column, delete, desc, func, insert, literal_column,
+                        select, table, tuple_, update)
+from sqlalchemy.engine import Result, Row
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import aliased
 
-from src.core.config import configure_logging
-from src.core.exceptions import ExceptDB, ExceptUser
-from src.posts.models import Post
-from src.posts.schemas import PostCreate, PostWithAutor, PostInfo
+from src.core.cache_tags import TAG_FEED, author_tag, invalidate_tags
+from src.core.config import setting
+from src.core.database import dialect_insert
+from src.core.exceptions import ExceptDB, ExceptUser, NotFindPost
+from src.posts.models import SEARCH_CONFIG, LikesPost, Outbox, Post
+from src.posts.pagination import decode_cursor, encode_cursor
+from src.posts.schemas import (FOUND_POSTS, POSTS_WITH_AUTHOR, LikeResult,
+                               PostCreate, PostInfo, PostPage, PostWithAutor,
+                               SearchPage)
+from src.tasks.outbox import TOPIC_LIKE, TOPIC_POST, wake_outbox_relay
 from src.users.models import User
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
+POST_READ_COLUMNS = (
+    Post.id,
+    Post.title,
+    Post.body,
+    Post.date_creation,
+    Post.id_user,
+    Post.like_count,
+)
+# колонки PostWithAutor (поиск добавляет rank)
+POST_WITH_AUTHOR_COLUMNS = (
+    Post.id,
+    User.username.label("user"),
+    Post.title,
+    Post.body,
+    Post.date_creation.label("data_create"),
+    Post.like_count,
+)
+
 
 async def get_post_from_db(
     session: AsyncSession, id_user: Optional[int] = None
-) -> list[Post]:
+) -> list[dict[str, Any]]:
     """
     Получение постов всех пользователей или пользователя указанного id
     :param session: AsyncSession
         сессия БД
     :param id_user: Optional[int] = None
         id пользователя, по умолчанию не указывается
-    :return: list[Post]
-        список постов
+    :return: list[dict[str, Any]]
+        список постов (колонки PostRead) без создания ORM-объектов; строки
+        из БД не проверяются и сериализуются как есть (ORJSONResponse)
     """
+    stmt = select(*POST_READ_COLUMNS)
     if id_user:
-        stmt = select(Post).where(Post.id_user == id_user)
+        stmt = stmt.where(Post.id_user == id_user)
     else:
-        stmt = select(Post).order_by(desc(Post.id))
-    posts = await session.scalars(stmt)
-    return list(posts)
+        stmt = stmt.order_by(desc(Post.id))
+    res: Result = await session.execute(stmt)
+    return [row._asdict() for row in res]
+
+
+async def stream_posts_from_db(
+    session: AsyncSession, batch_size: int = setting.export.batch_size
+) -> AsyncIterator[list[Row]]:
+    """
+        Потоковое чтение всех постов пачками (серверный курсор на asyncpg)
+    :param session: AsyncSession
+        сессия БД, должна быть открыта на время чтения
+    :param batch_size: int
+        размер пачки
+    :return: AsyncIterator[list[Row]]
+        пачки строк с колонками PostRead
+    """
+    stmt = (
+        select(*POST_READ_COLUMNS)
+        .order_by(Post.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await session.stream(stmt)
+    async for rows in result.partitions(batch_size):
+        yield rows
 
 
 async def add_new_post(session: AsyncSession, post: PostCreate, id_user: int) -> None:
@@ -52,10 +101,20 @@ async def add_new_post(session: AsyncSession, post: PostCreate, id_user: int) ->
     new_post.id_user = id_user
     try:
         session.add(new_post)
+        await session.flush()
+        # событие о новом посте для WebSocket-клиентов (src.posts.realtime)
+        session.add(
+            Outbox(
+                topic=TOPIC_POST,
+                payload={"id": new_post.id, "title": new_post.title, "id_user": id_user},
+            )
+        )
         await session.commit()
     except SQLAlchemyError:
         logger.exception("Error add new post")
         raise ExceptDB("Error in DB")
+    wake_outbox_relay()
+    await invalidate_tags(TAG_FEED, author_tag(id_user))
 
 
 async def delete_post(session: AsyncSession, id_post: int, id_user: int) -> bool:
@@ -81,31 +140,136 @@ async def delete_post(session: AsyncSession, id_post: int, id_user: int) -> bool
             logger.exception("Error delete post")
             raise ExceptDB("Error in DB")
         else:
+            await invalidate_tags(TAG_FEED, author_tag(id_user))
             return True
     else:
         return False
 
 
-async def get_post_with_user_from_db(session: AsyncSession) -> list[PostWithAutor]:
+async def get_post_with_user_from_db(
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = setting.pagination.page_size,
+) -> PostPage:
     """
-        Возвращает список постов с автором
+        Возвращает страницу постов с автором (keyset-пагинация по дате создания и id)
     :param session: AsyncSession
         сессия ДБ
+    :param cursor: Optional[str] = None
+        курсор страницы, по умолчанию возвращается первая страница
+    :param limit: int
+        размер страницы, ограничивается setting.pagination.max_page_size
+    :return: PostPage
+        Страница постов с автором и курсор следующей страницы
+    """
+    limit = min(max(limit, 1), setting.pagination.max_page_size)
+    stmt = (
+        select(*POST_WITH_AUTHOR_COLUMNS)
+        .join(Post.user)
+        .order_by(desc(Post.date_creation), desc(Post.id))
+        .limit(limit + 1)
+    )
+    if cursor:
+        date_creation, id_post = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Post.date_creation, Post.id) < tuple_(date_creation, id_post)
+        )
+    rows: list[Row] = list(await session.execute(stmt))
+
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].data_create, rows[-1].id)
+
+    posts: list[PostWithAutor] = POSTS_WITH_AUTHOR.validate_python(
+        [row._asdict() for row in rows]
+    )
+    return PostPage(posts=posts, next_cursor=next_cursor)
+
+
+async def get_hot_posts_from_db(
+    session: AsyncSession, limit: int = setting.pagination.page_size
+) -> list[PostWithAutor]:
+    """
+        Возвращает самые популярные посты (по числу лайков)
+    :param session: AsyncSession
+        сессия ДБ
+    :param limit: int
+        количество постов, ограничивается setting.pagination.max_page_size
     :return: list[PostWithAutor]
-        Список постов с автором
-    """
-    stmt = select(Post).options(joinedload(Post.user))
-    posts = await session.scalars(stmt)
-    lst_posts: list[PostWithAutor] = list()
-    for post in posts:  # type: Post
-        post_with_author: PostWithAutor = PostWithAutor(
-            user=post.user.username,
-            title=post.title,
-            body=post.body,
-            data_create=post.date_creation,
+        Список постов с автором и числом лайков
+    """
+    limit = min(max(limit, 1), setting.pagination.max_page_size)
+    stmt = (
+        select(*POST_WITH_AUTHOR_COLUMNS)
+        .join(Post.user)
+        .order_by(desc(Post.like_count), desc(Post.id))
+        .limit(limit)
+    )
+    rows = await session.execute(stmt)
+    return POSTS_WITH_AUTHOR.validate_python([row._asdict() for row in rows])
+
+
+async def search_posts_from_db(
+    session: AsyncSession,
+    query: str,
+    limit: int = setting.pagination.page_size,
+    offset: int = 0,
+) -> SearchPage:
+    """
+        Полнотекстовый поиск постов по заголовку и тексту, результаты по убыванию
+        релевантности (заголовок весит больше текста)
+    :param session: AsyncSession
+        сессия ДБ
+    :param query: str
+        поисковый запрос (слова через пробел, в Postgres - синтаксис websearch)
+    :param limit: int
+        размер страницы, ограничивается setting.pagination.max_page_size
+    :param offset: int
+        число пропускаемых результатов
+    :return: SearchPage
+        страница найденных постов и смещение следующей страницы
+    """
+    limit = min(max(limit, 1), setting.pagination.max_page_size)
+    columns = POST_WITH_AUTHOR_COLUMNS
+    if session.get_bind().dialect.name == "postgresql":
+        # GIN-индекс ix_posts_search_vector
+        vector = literal_column("posts.search_vector")
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(vector, ts_query).label("rank")
+        stmt = select(*columns, rank).where(vector.op("@@")(ts_query))
+    else:
+        # FTS5: слова запроса экранируются, чтобы не разбирались как синтаксис MATCH
+        words: list[str] = re.findall(r"\w+", query)
+        if not words:
+            return SearchPage(posts=[])
+        fts = table("posts_fts", column("rowid"))
+        rank = (-func.bm25(literal_column("posts_fts"), 10.0, 1.0)).label("rank")
+        stmt = (
+            select(*columns, rank)
+            .join(fts, fts.c.rowid == Post.id)
+            .where(
+                literal_column("posts_fts").op("MATCH")(
+                    " ".join(f'"{word}"' for word in words)
+                )
+            )
         )
-        lst_posts.append(post_with_author)
-    return lst_posts
+    stmt = (
+        stmt.join(User, User.id == Post.id_user)
+        .order_by(desc(rank), desc(Post.id))
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    rows = (await session.execute(stmt)).all()
+
+    next_offset: Optional[int] = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    return SearchPage(
+        posts=FOUND_POSTS.validate_python([row._asdict() for row in rows]),
+        next_offset=next_offset,
+    )
 
 
 async def add_like_post(session: AsyncSession, id_post: int, id_user: int) -> PostInfo:
@@ -123,32 +287,61 @@ async def add_like_post(session: AsyncSession, id_post: int, id_user: int) -> Po
     logger.info(
         "Start add like from user with id %d fot post with id %d", id_user, id_post
     )
-    user: User = await session.get(User, id_user)
-
-    stmt = select(Post).where(Post.id == id_post).options(selectinload(Post.like_user))
+    author = aliased(User)
+    friend = aliased(User)
+    stmt = (
+        select(Post.title, Post.id_user, author.username, author.email, friend.username)
+        .join(author, author.id == Post.id_user)
+        .join(friend, friend.id == id_user)
+        .where(Post.id == id_post)
+    )
     res: Result = await session.execute(stmt)
-    post: Post = res.scalars().first()
+    row = res.one_or_none()
+    if row is None:
+        logger.info("Post not find")
+        raise NotFindPost(f"Not find post by id {id_post}")
+    title_post, id_author, name_user, email, name_friend = row
     # проверка принадлежности поста пользователю
-    if post.id_user == id_user:
+    if id_author == id_user:
         logger.info("Post belongs to the user")
         raise ExceptUser("This user's post")
 
-    user_post: User = await session.get(User, post.id_user)
+    info = PostInfo(
+        title_post=title_post,
+        name_user=name_user,
+        email=email,
+        name_friend=name_friend,
+    )
     try:
-        post.like_user.append(user)
+        res = await session.execute(
+            dialect_insert(session, LikesPost)
+            .values(post_id=id_post, user_id=id_user)
+            .on_conflict_do_nothing()
+            .returning(LikesPost.post_id)
+        )
+        if res.scalar_one_or_none() is None:
+            logger.info("Like already exists")
+            raise ExceptUser("Like already exists")
+        await session.execute(
+            update(Post)
+            .where(Post.id == id_post)
+            .values(like_count=Post.like_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        # уведомление автору доставляется в Redis фоновым relay (src.tasks.outbox)
+        session.add(
+            Outbox(topic=TOPIC_LIKE, payload={**info.model_dump(), "id_post": id_post})
+        )
         await session.commit()
-    except SQLAlchemyError as exp:
-        logger.exception(f"Error db {exp}")
+    except SQLAlchemyError:
+        logger.exception("Error add like")
         await session.rollback()
         raise ExceptDB("Error in DB")
     else:
         logger.info("Like to post add complete")
-        return PostInfo(
-            title_post=post.title,
-            name_user=user_post.username,
-            email=user_post.email,
-            name_friend=user.username,
-        )
+        wake_outbox_relay()
+        await invalidate_tags(TAG_FEED, author_tag(id_author))
+        return info
 
 
 async def delete_like_post_db(session: AsyncSession, id_post: int, id_user: int) -> bool:
@@ -161,27 +354,219 @@ async def delete_like_post_db(session: AsyncSession, id_post: int, id_user: int)
     :param id_user: int
         id пользователя
     :return: bool
-        результат выполнения
+        результат выполнения (False, если лайка не было)
     """
     logger.info(
         "Start delete like from user with id %d fot post with id %d", id_user, id_post
     )
-    user: User = await session.get(User, id_user)
-
-    stmt = select(Post).where(Post.id == id_post).options(selectinload(Post.like_user))
-    res: Result = await session.execute(stmt)
-    post: Post = res.scalars().first()
-    # проверка принадлежности поста пользователю
-    if post.id_user == id_user:
-        logger.info("Post belongs to the user")
-        return False
     try:
-        post.like_user.remove(user)
+        res: Result = await session.execute(
+            delete(LikesPost)
+            .where(LikesPost.post_id == id_post, LikesPost.user_id == id_user)
+            .returning(LikesPost.post_id)
+            .execution_options(synchronize_session=False)
+        )
+        if res.scalar_one_or_none() is None:
+            logger.info("Like not find")
+            return False
+        res = await session.execute(
+            update(Post)
+            .where(Post.id == id_post)
+            .values(like_count=Post.like_count - 1)
+            .returning(Post.id_user)
+            .execution_options(synchronize_session=False)
+        )
+        id_author: int = res.scalar_one()
         await session.commit()
-    except SQLAlchemyError as exp:
-        logger.exception(f"Error db {exp}")
+    except SQLAlchemyError:
+        logger.exception("Error delete like")
         await session.rollback()
         return False
     else:
         logger.info("Like to post delete complete")
+        await invalidate_tags(TAG_FEED, author_tag(id_author))
         return True
+
+
+async def bulk_like_posts(
+    session: AsyncSession, id_user: int, like: list[int], unlike: list[int]
+) -> list[LikeResult]:
+    """
+        Пакетная установка и снятие лайков: одна проверка постов, по одному
+        многострочному запросу на вставку, удаление и счетчики, один commit
+    :param session: AsyncSession
+        сессия БД
+    :param id_user: int
+        id пользователя
+    :param like: list[int]
+        id постов, которые нужно лайкнуть
+    :param unlike: list[int]
+        id постов, с которых нужно снять лайк
+    :return: list[LikeResult]
+        результат по каждому id (в порядке like, затем unlike)
+    :raise ExceptUser:
+        если один id указан и в like, и в unlike
+    """
+    like = list(dict.fromkeys(like))
+    unlike = list(dict.fromkeys(unlike))
+    if set(like) & set(unlike):
+        raise ExceptUser("Post ids in like and unlike intersect")
+    logger.info(
+        "Start bulk likes from user with id %d: %d like, %d unlike",
+        id_user,
+        len(like),
+        len(unlike),
+    )
+
+    author = aliased(User)
+    friend = aliased(User)
+    res: Result = await session.execute(
+        select(
+            Post.id,
+            Post.title,
+            Post.id_user,
+            author.username,
+            author.email,
+            friend.username,
+            LikesPost.user_id.is_not(None),
+        )
+        .join(author, author.id == Post.id_user)
+        .join(friend, friend.id == id_user)
+        .outerjoin(
+            LikesPost, and_(LikesPost.post_id == Post.id, LikesPost.user_id == id_user)
+        )
+        .where(Post.id.in_(like + unlike))
+    )
+    posts: dict[int, Row] = {row[0]: row for row in res.all()}
+
+    results: dict[tuple[str, int], str] = dict()
+    to_like: list[int] = list()
+    to_unlike: list[int] = list()
+    for id_post in like:
+        row: Optional[Row] = posts.get(id_post)
+        if row is None:
+            results["like", id_post] = "not_found"
+        elif row[2] == id_user:
+            results["like", id_post] = "own_post"
+        elif row[6]:
+            results["like", id_post] = "already_liked"
+        else:
+            to_like.append(id_post)
+    for id_post in unlike:
+        row = posts.get(id_post)
+        if row is None:
+            results["unlike", id_post] = "not_found"
+        elif not row[6]:
+            results["unlike", id_post] = "not_liked"
+        else:
+            to_unlike.append(id_post)
+
+    liked: list[int] = list()
+    unliked: list[int] = list()
+    try:
+        if to_like:
+            res = await session.execute(
+                dialect_insert(session, LikesPost)
+                .values([{"post_id": id_post, "user_id": id_user} for id_post in to_like])
+                .on_conflict_do_nothing()
+                .returning(LikesPost.post_id)
+            )
+            liked = list(res.scalars())
+        if to_unlike:
+            res = await session.execute(
+                delete(LikesPost)
+                .where(LikesPost.user_id == id_user, LikesPost.post_id.in_(to_unlike))
+                .returning(LikesPost.post_id)
+                .execution_options(synchronize_session=False)
+            )
+            unliked = list(res.scalars())
+        for ids, delta in ((liked, 1), (unliked, -1)):
+            if ids:
+                await session.execute(
+                    update(Post)
+                    .where(Post.id.in_(ids))
+                    .values(like_count=Post.like_count + delta)
+                    .execution_options(synchronize_session=False)
+                )
+        if liked:
+            # уведомления авторам доставляются в Redis фоновым relay (src.tasks.outbox)
+            await session.execute(
+                insert(Outbox).values(
+                    [
+                        {
+                            "topic": TOPIC_LIKE,
+                            "payload": {
+                                **PostInfo(
+                                    title_post=posts[id_post][1],
+                                    name_user=posts[id_post][3],
+                                    email=posts[id_post][4],
+                                    name_friend=posts[id_post][5],
+                                ).model_dump(),
+                                "id_post": id_post,
+                            },
+                        }
+                        for id_post in liked
+                    ]
+                )
+            )
+        await session.commit()
+    except SQLAlchemyError:
+        logger.exception("Error bulk likes")
+        await session.rollback()
+        raise ExceptDB("Error in DB")
+
+    logger.info("Bulk likes complete: %d liked, %d unliked", len(liked), len(unliked))
+    # строки, которые успел изменить параллельный запрос
+    for id_post in to_like:
+        results["like", id_post] = "liked" if id_post in liked else "already_liked"
+    for id_post in to_unlike:
+        results["unlike", id_post] = "unliked" if id_post in unliked else "not_liked"
+    if liked:
+        wake_outbox_relay()
+    if liked or unliked:
+        await invalidate_tags(
+            TAG_FEED, *{author_tag(posts[id_post][2]) for id_post in liked + unliked}
+        )
+    return [
+        LikeResult(id=id_post, action=action, result=results[action, id_post])
+        for action, ids in (("like", like), ("unlike", unlike))
+        for id_post in ids
+    ]
+
+
+async def reconcile_like_count(session: AsyncSession) -> int:
+    """
+        Пересчитывает денормализованный счетчик лайков постов по таблице likes_post
+    :param session: AsyncSession
+        сессия БД
+    :return: int
+        количество исправленных постов
+    """
+    logger.info("Start reconcile like counters")
+    real_count = (
+        select(func.count(LikesPost.post_id))
+        .where(LikesPost.post_id == Post.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Post)
+        .where(Post.like_count != real_count)
+        .values(like_count=real_count)
+        .returning(Post.id_user)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        res: Result = await session.execute(stmt)
+        id_authors: list[int] = list(res.scalars())
+        await session.commit()
+    except SQLAlchemyError:
+        logger.exception("Error reconcile like counters")
+        await session.rollback()
+        raise ExceptDB("Error in DB")
+    fixed: int = len(id_authors)
+    if fixed:
+        await invalidate_tags(
+            TAG_FEED, *(author_tag(id_user) for id_user in set(id_authors))
+        )
+    logger.info("Like counters repaired for %d posts", fixed)
+    return fixed
@@ -0,0 +1,42 @@
+from typing import AsyncIterator, Literal
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.posts.crud import stream_posts_from_db
+from src.posts.schemas import PostRead
+
+ExportFormat = Literal["ndjson", "json"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+async def export_posts(
+    session_maker: async_sessionmaker[AsyncSession], fmt: ExportFormat
+) -> AsyncIterator[bytes]:
+    """
+        Выгрузка всех постов по частям: одна пачка строк БД - один chunk ответа
+    :param session_maker: async_sessionmaker[AsyncSession]
+        фабрика сессий (сессия живет, пока отправляется ответ)
+    :param fmt: ExportFormat
+        ndjson - пост на строку, json - массив постов
+    :return: AsyncIterator[bytes]
+        части тела ответа
+    """
+    async with session_maker() as session:
+        first: bool = True
+        if fmt == "json":
+            yield b"["
+        async for rows in stream_posts_from_db(session):
+            lines: list[str] = [
+                PostRead.model_validate(row._mapping).model_dump_json() for row in rows
+            ]
+            if fmt == "ndjson":
+                yield ("\n".join(lines) + "\n").encode()
+            else:
+                yield (("" if first else ",") + ",".join(lines)).encode()
+            first = False
+        if fmt == "json":
+            yield b"]"
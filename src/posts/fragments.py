@@ -0,0 +1,133 @@
+"""
+Кеш отрендеренного списка постов главной страницы.
+
+Ключ фрагмента содержит версию тега ленты (см. src.core.cache_tags), поэтому
+создание/удаление поста и лайки сразу делают старые фрагменты недоступными.
+Фрагменты хранятся в Redis и дополнительно в памяти процесса (L1).
+"""
+
+import hashlib
+import logging
+from typing import Optional
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache_tags import TAG_FEED, get_tag_versions
+from src.core.config import setting, templates
+from src.core.redis_client import get_redis
+from src.core.ttl_cache import TTLCache
+from src.posts.crud import get_post_with_user_from_db
+from src.posts.schemas import PostPage
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_PREFIX = "feed-fragment"
+
+fragment_cache = TTLCache(
+    maxsize=setting.fragment_cache.l1_maxsize, ttl=setting.fragment_cache.l1_ttl
+)
+
+
+async def get_feed_version() -> Optional[str]:
+    """
+        Текущая версия ленты, None - если Redis недоступен (кеширование отключается)
+    """
+    try:
+        (version,) = await get_tag_versions(TAG_FEED)
+    except RedisError:
+        logger.warning("Error get feed version")
+        return None
+    return version
+
+
+def feed_etag(version: str, request: Request, cursor: Optional[str]) -> str:
+    """
+        ETag главной страницы для версии ленты и страницы курсора
+    """
+    raw: str = f"{version}:{request.base_url}:{cursor or ''}"
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+async def render_feed(
+    request: Request,
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    version: Optional[str] = None,
+) -> str:
+    """
+        Рендерит список постов (posts/feed.html) с использованием кеша
+    :param request: Request
+        запрос (нужен для url_for в шаблоне)
+    :param session: AsyncSession
+        сессия БД, используется только при промахе кеша
+    :param cursor: Optional[str]
+        курсор страницы
+    :param version: Optional[str]
+        версия ленты, None - рендер без кеша
+    :return: str
+        html фрагмента
+    :raise ExceptCursor:
+        если курсор неверный
+    """
+    key: Optional[str] = None
+    if version is not None:
+        key = f"{FRAGMENT_PREFIX}:{version}:{request.base_url}:{cursor or ''}"
+        html: Optional[str] = fragment_cache.get(key)
+        if html is not None:
+            return html
+        try:
+            html = await get_redis().get(key)
+        except RedisError:
+            logger.warning("Error get feed fragment")
+        if html is not None:
+            fragment_cache.set(key, html)
+            return html
+
+    page: PostPage = await get_post_with_user_from_db(session=session, cursor=cursor)
+    html = templates.get_template("posts/feed.html").render(
+        request=request, posts=page.posts, next_cursor=page.next_cursor
+    )
+    if key is not None:
+        fragment_cache.set(key, html)
+        try:
+            await get_redis().set(key, html, ex=setting.fragment_cache.expire)
+        except RedisError:
+            logger.warning("Error set feed fragment")
+    return html
+
+
+async def index_response(
+    request: Request,
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    status_code: int = 200,
+    conditional: bool = False,
+) -> Response:
+    """
+        Ответ со страницей index.html
+    :param conditional: bool
+        добавить ETag (если версия ленты известна) и вернуть 304 без обращения к БД
+        при совпадении If-None-Match
+    :raise ExceptCursor:
+        если курсор неверный
+    """
+    version: Optional[str] = await get_feed_version()
+    etag: Optional[str] = None
+    if version is not None and conditional:
+        etag = feed_etag(version, request, cursor)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+    feed: str = await render_feed(request, session, cursor=cursor, version=version)
+    response: Response = templates.TemplateResponse(
+        request=request,
+        name="index.html",
+        context={"feed": feed},
+        status_code=status_code,
+    )
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return response
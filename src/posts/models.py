@@ -1,10 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from sqlalchemy import (DateTime, ForeignKey, String, Text, UniqueConstraint,
-                        func, select)
-from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import Mapped, mapped_column, object_session, relationship
+from sqlalchemy import (DDL, JSON, DateTime, ForeignKey, Index, String, Text,
+                        UniqueConstraint, event, func)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
 
@@ -14,6 +13,10 @@ if TYPE_CHECKING:
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_date_creation_id", "date_creation", "id"),
+        Index("ix_posts_like_count_id", "like_count", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(100), default="", server_default="")
@@ -21,9 +24,12 @@ class Post(Base):
     date_creation: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        default=datetime.utcnow(),
+        # время вставки, а не импорта модуля (порядок ленты по date_creation, id)
+        default=lambda: datetime.now(timezone.utc),
     )
     id_user: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # денормализованный счетчик лайков, поддерживается в add_like_post/delete_like_post_db
+    like_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
     user: Mapped["User"] = relationship(back_populates="posts")
     like_user: Mapped[list["User"]] = relationship(
@@ -32,22 +38,6 @@ class Post(Base):
         uselist=True,
     )
 
-    @hybrid_property
-    def like_count(self):
-        query = select(func.count(LikesPost.post_id)).where(
-            LikesPost.post_id == self.id
-        )
-        result = object_session(self).execute(query)
-        return result.scalars().one()
-
-    @like_count.expression
-    def like_count(cls):
-        return (
-            select(func.count(LikesPost.post_id))
-            .where(LikesPost.post_id == cls.id)
-            .label("like_count")
-        )
-
     def __str__(self):
         return f"{self.__class__.__name__}(id={self.id}, title={self.title!r}, user_id={self.user_id})"
 
@@ -55,6 +45,52 @@ class Post(Base):
         return str(self)
 
 
+# Полнотекстовый поиск по title и body (src.posts.crud.search_posts_from_db).
+# Postgres: вычисляемая колонка tsvector с GIN-индексом, SQLite: таблица FTS5,
+# синхронизируемая триггерами. В ORM-модель не входят; для существующей БД
+# создаются миграцией add_posts_full_text_search
+SEARCH_CONFIG = "russian"
+
+POSTGRES_SEARCH_DDL: tuple[str, ...] = (
+    f"ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(body, '')), 'B')) STORED",
+    "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)",
+)
+
+SQLITE_SEARCH_DDL: tuple[str, ...] = (
+    "CREATE VIRTUAL TABLE posts_fts USING fts5("
+    "title, body, content='posts', content_rowid='id')",
+    "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body); "
+    "END",
+    "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "END",
+    "CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, body ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body); "
+    "END",
+)
+
+
+def listen_ddl(event_name: str, statements: tuple[str, ...], dialect: str) -> None:
+    """
+    Выполнение DDL для таблицы posts при ее создании/удалении в указанном диалекте
+    """
+    for statement in statements:
+        event.listen(
+            Post.__table__, event_name, DDL(statement).execute_if(dialect=dialect)
+        )
+
+
+listen_ddl("after_create", POSTGRES_SEARCH_DDL, "postgresql")
+listen_ddl("after_create", SQLITE_SEARCH_DDL, "sqlite")
+listen_ddl("before_drop", ("DROP TABLE IF EXISTS posts_fts",), "sqlite")
+
+
 class LikesPost(Base):
     __tablename__ = "likes_post"
     __table_args__ = (
@@ -66,3 +102,20 @@ class LikesPost(Base):
 
     # user: Mapped["User"] = relationship(back_populates="user_details")
     # product: Mapped["Product"] = relationship(back_populates="orders_details")
+
+
+class Outbox(Base):
+    """
+    Исходящие уведомления (transactional outbox): запись добавляется в той же
+    транзакции, что и лайк, и доставляется в Redis фоновым relay (src.tasks.outbox)
+    """
+
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    topic: Mapped[str] = mapped_column(String(50))
+    payload: Mapped[dict] = mapped_column(JSON)
+    date_creation: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
@@ -0,0 +1,36 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from src.core.exceptions import ExceptCursor
+
+
+def encode_cursor(date_creation: datetime, id_post: int) -> str:
+    """
+        Создает непрозрачный курсор для keyset-пагинации
+    :param date_creation: datetime
+        дата создания последнего поста на странице
+    :param id_post: int
+        id последнего поста на странице
+    :return: str
+        курсор (base64url без выравнивания)
+    """
+    raw: bytes = json.dumps([date_creation.isoformat(), id_post]).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+        Раскодирует курсор, созданный encode_cursor
+    :param cursor: str
+        курсор
+    :return: tuple[datetime, int]
+        дата создания и id поста, после которых начинается следующая страница
+    """
+    try:
+        raw: bytes = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_creation, id_post = json.loads(raw)
+        return datetime.fromisoformat(date_creation), int(id_post)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ExceptCursor(f"Invalid cursor {cursor!r}")
@@ -0,0 +1,102 @@
+"""
+Push-уведомления о новых постах и лайках через WebSocket.
+
+События публикуются в канал Redis (из relay таблицы outbox, см. src.tasks.outbox)
+и рассылаются подписчиком каждого воркера (listen_events, запускается в lifespan)
+подключенным к нему клиентам. У каждого соединения ограниченная очередь отправки:
+клиент, который не успевает читать события, отключается, а не копит их в памяти.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Iterable
+
+from redis.exceptions import RedisError
+
+from src.core.config import setting
+from src.core.metrics import WS_CONNECTIONS, WS_DROPPED
+from src.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "posts:events"
+
+
+class Connection:
+    """
+    Очередь отправки одного WebSocket-соединения
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = asyncio.Event()
+
+
+class Hub:
+    """
+    Соединения воркера и рассылка им событий
+    """
+
+    def __init__(self) -> None:
+        self.connections: set[Connection] = set()
+        self.dropped = 0
+
+    def connect(self, queue_size: int = setting.realtime.queue_size) -> Connection:
+        connection = Connection(queue_size)
+        self.connections.add(connection)
+        WS_CONNECTIONS.inc()
+        return connection
+
+    def disconnect(self, connection: Connection) -> None:
+        if connection in self.connections:
+            self.connections.remove(connection)
+            WS_CONNECTIONS.dec()
+
+    def broadcast(self, message: str) -> None:
+        """
+        Ставит событие в очереди всех соединений, переполненные соединения отключаются
+        """
+        for connection in list(self.connections):
+            try:
+                connection.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                WS_DROPPED.inc()
+                logger.info("Drop slow WebSocket consumer")
+                self.disconnect(connection)
+                connection.dropped.set()
+
+    def stats(self) -> dict[str, int]:
+        return {"connections": len(self.connections), "dropped": self.dropped}
+
+
+hub = Hub()
+
+
+async def publish_events(events: Iterable[dict]) -> None:
+    """
+        Публикует события для всех воркеров
+    :raise RedisError:
+        если Redis недоступен
+    """
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for event in events:
+            pipe.publish(EVENTS_CHANNEL, json.dumps(event, ensure_ascii=False))
+        await pipe.execute()
+
+
+async def listen_events() -> None:
+    """
+    Подписка на события и рассылка соединениям воркера (запускается в lifespan)
+    """
+    while True:
+        try:
+            async with get_redis().pubsub() as pubsub:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        hub.broadcast(message["data"])
+        except RedisError:
+            logger.warning("Lost subscription to %s, retry", EVENTS_CHANNEL)
+            await asyncio.sleep(1)
@@ -1,34 +1,57 @@
-from typing import Annotated
+import asyncio
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, Form, Path, Request, Response, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import (APIRouter, Depends, Form, Path, Query, Request, Response,
+                     WebSocket, WebSocketDisconnect, status)
+from fastapi.exceptions import HTTPException
+from fastapi.responses import (HTMLResponse, JSONResponse, ORJSONResponse,
+                               StreamingResponse)
 from fastapi_cache.decorator import cache
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.core.config import templates
-from src.core.database import get_async_session
-from src.core.exceptions import ExceptDB, ExceptUser
+from src.core.cache_tags import TAG_FEED, author_tag, tagged_key_builder
+from src.core.config import COOKIE_NAME, setting, templates
+from src.core.database import (get_async_session, get_read_session,
+                               get_read_session_maker, get_session_maker)
+from src.core.exceptions import ExceptCursor, ExceptDB, ExceptUser, NotFindPost
+from src.core.query_budget import query_budget
+from src.core.rate_limit import RateLimit
 from src.posts.crud import (
     add_like_post,
     add_new_post,
+    bulk_like_posts,
     delete_like_post_db,
     delete_post,
+    get_hot_posts_from_db,
     get_post_from_db,
     get_post_with_user_from_db,
+    search_posts_from_db,
 )
-from src.posts.models import Post
-from src.posts.schemas import PostCreate, PostWithAutor, PostInfo
-from src.users.depends import current_active_user
+from src.posts.export import MEDIA_TYPES, ExportFormat, export_posts
+from src.posts.fragments import index_response
+from src.posts.realtime import Connection, hub
+from src.posts.schemas import (LikeResult, LikesBulk, PostCreate, PostInfo,
+                               PostPage, PostRead, PostWithAutor, SearchPage)
+from src.users.depends import current_active_user, websocket_user
 from src.users.models import User
-from src.tasks.tasks import send_email
 
 router = APIRouter(prefix="/posts", tags=["Post"])
 
 
-@router.get("/")
-async def get_all_posts(session: AsyncSession = Depends(get_async_session)):
-    posts: list[Post] = await get_post_from_db(session)
-    return posts
+@router.get("/", response_class=ORJSONResponse)
+@query_budget(2)
+async def get_all_posts(
+    stream: Annotated[Optional[ExportFormat], Query()] = None,
+    session: AsyncSession = Depends(get_read_session),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_read_session_maker),
+):
+    if stream is not None:
+        return StreamingResponse(
+            export_posts(session_maker, stream), media_type=MEDIA_TYPES[stream]
+        )
+    posts: list[dict] = await get_post_from_db(session)
+    # строки БД сериализуются orjson без jsonable_encoder
+    return ORJSONResponse(posts)
 
 
 @router.get("/new_post/", name="posts:new_post", response_class=HTMLResponse)
@@ -39,14 +62,48 @@ def add_new_post_form(request: Request) -> HTMLResponse:
     )
 
 
-@router.get("/{id}")
-@cache(expire=60)
+@router.get(
+    "/hot/", response_model=list[PostWithAutor], response_class=ORJSONResponse
+)
+@query_budget(2)
+async def get_hot_posts(
+    limit: Annotated[
+        int, Query(gt=0, le=setting.pagination.max_page_size)
+    ] = setting.pagination.page_size,
+    session: AsyncSession = Depends(get_read_session),
+):
+    posts: list[PostWithAutor] = await get_hot_posts_from_db(session, limit=limit)
+    return posts
+
+
+@router.get("/search/", response_model=SearchPage, response_class=ORJSONResponse)
+@query_budget(1)
+async def search_posts(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[
+        int, Query(gt=0, le=setting.pagination.max_page_size)
+    ] = setting.pagination.page_size,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    session: AsyncSession = Depends(get_read_session),
+):
+    page: SearchPage = await search_posts_from_db(
+        session, query=q, limit=limit, offset=offset
+    )
+    return page
+
+
+@router.get("/{id}", response_model=list[PostRead], response_class=ORJSONResponse)
+@cache(
+    expire=setting.cache.expire,
+    key_builder=tagged_key_builder(lambda kwargs: [author_tag(kwargs["id"])]),
+)
+@query_budget(2)
 async def get_posts_user_by_id(
     id: Annotated[int, Path()],
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_active_user),
 ):
-    posts: list[Post] = await get_post_from_db(session=session, id_user=id)
+    posts: list[dict] = await get_post_from_db(session=session, id_user=id)
     return posts
 
 
@@ -71,12 +128,7 @@ async def create_new_post(
             },
             status_code=404,
         )
-    posts: list[PostWithAutor] = await get_post_with_user_from_db(session=session)
-    return templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={"posts": posts},
-    )
+    return await index_response(request, session)
 
 
 @router.delete("/{id}", response_class=JSONResponse)
@@ -101,21 +153,38 @@ async def delete_post_by_id(
     return bool(res)
 
 
-@router.get("/users/", response_class=JSONResponse)
-@cache(expire=60)
+@router.get("/users/", response_model=PostPage, response_class=ORJSONResponse)
+@cache(
+    expire=setting.cache.expire,
+    key_builder=tagged_key_builder(lambda kwargs: [TAG_FEED]),
+)
+@query_budget(2)
 async def get_posts_with_user(
-    session: AsyncSession = Depends(get_async_session),
+    cursor: Annotated[Optional[str], Query()] = None,
+    limit: Annotated[
+        int, Query(gt=0, le=setting.pagination.max_page_size)
+    ] = setting.pagination.page_size,
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_active_user),
 ):
-    posts: list[PostWithAutor] = await get_post_with_user_from_db(session)
-    return posts
+    try:
+        page: PostPage = await get_post_with_user_from_db(
+            session, cursor=cursor, limit=limit
+        )
+    except ExceptCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return page
 
 
 @router.post(
     "/{id}/likes",
     status_code=201,
     response_class=JSONResponse,
+    dependencies=[Depends(RateLimit("like"))],
 )
+@query_budget(5)
 async def post_like_post(
     response: Response,
     id: Annotated[int, Path(gt=0)],
@@ -124,13 +193,15 @@ async def post_like_post(
 ):
     try:
         res: PostInfo = await add_like_post(session=session, id_post=id, id_user=user.id)
+    except NotFindPost:
+        response.status_code = 404
+        return {"result": "Post not found"}
     except ExceptUser:
         response.status_code = 400
         return {"result": "Error User"}
     except ExceptDB:
         response.status_code = 400
         return {"result": "Error BD"}
-    send_email.delay(res.model_dump())
     return {"result": res}
 
 
@@ -139,6 +210,7 @@ async def post_like_post(
     status_code=200,
     response_class=JSONResponse,
 )
+@query_budget(4)
 async def delete_like_post(
     response: Response,
     id: Annotated[int, Path(gt=0)],
@@ -151,6 +223,76 @@ async def delete_like_post(
     return {"result": res}
 
 
+@router.post("/likes/", response_class=JSONResponse)
+@query_budget(7)
+async def bulk_likes(
+    response: Response,
+    likes: LikesBulk,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    """
+    Пакетная установка и снятие лайков с результатом по каждому id поста
+    """
+    try:
+        res: list[LikeResult] = await bulk_like_posts(
+            session=session, id_user=user.id, like=likes.like, unlike=likes.unlike
+        )
+    except ExceptUser:
+        response.status_code = 400
+        return {"result": "Error User"}
+    except ExceptDB:
+        response.status_code = 400
+        return {"result": "Error BD"}
+    return {"result": res}
+
+
+async def send_events(websocket: WebSocket, connection: Connection) -> None:
+    while True:
+        await websocket.send_text(await connection.queue.get())
+
+
+async def wait_disconnect(websocket: WebSocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/ws")
+async def posts_events(
+    websocket: WebSocket,
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+):
+    """
+    События о новых постах и лайках (src.posts.realtime), авторизация по cookie
+    """
+    user: Optional[User] = await websocket_user(
+        websocket.cookies.get(COOKIE_NAME), session_maker
+    )
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    connection: Connection = hub.connect()
+    tasks: dict[str, asyncio.Task] = {
+        "send": asyncio.create_task(send_events(websocket, connection)),
+        "receive": asyncio.create_task(wait_disconnect(websocket)),
+        "dropped": asyncio.create_task(connection.dropped.wait()),
+    }
+    try:
+        await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.disconnect(connection)
+        for task in tasks.values():
+            task.cancel()
+    if tasks["dropped"].done() and not tasks["dropped"].cancelled():
+        # клиент не успевает читать события
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except (RuntimeError, WebSocketDisconnect):
+            pass
+
+
 @router.post("/test")
 def post_test(
     title: str = Form(),
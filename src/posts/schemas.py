@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
 class PostCreate(BaseModel):
@@ -14,13 +15,37 @@ class PostRead(PostCreate):
     id: int
     date_creation: datetime
     id_user: int
+    like_count: int = 0
 
 
 class PostWithAutor(BaseModel):
+    id: int
     user: str
     title: str
     body: str
     data_create: datetime
+    like_count: int = 0
+
+
+# проверка строк выборки (словари колонок) одним вызовом pydantic-core
+POSTS_WITH_AUTHOR = TypeAdapter(list[PostWithAutor])
+
+
+class PostPage(BaseModel):
+    posts: list[PostWithAutor]
+    next_cursor: Optional[str] = None
+
+
+class PostFound(PostWithAutor):
+    rank: float
+
+
+FOUND_POSTS = TypeAdapter(list[PostFound])
+
+
+class SearchPage(BaseModel):
+    posts: list[PostFound]
+    next_offset: Optional[int] = None
 
 
 class PostInfo(BaseModel):
@@ -28,3 +53,16 @@ class PostInfo(BaseModel):
     name_user: str
     email: str
     name_friend: str
+
+
+class LikesBulk(BaseModel):
+    like: list[int] = Field(default_factory=list, max_length=100)
+    unlike: list[int] = Field(default_factory=list, max_length=100)
+
+
+class LikeResult(BaseModel):
+    id: int
+    action: Literal["like", "unlike"]
+    result: Literal[
+        "liked", "unliked", "not_found", "own_post", "already_liked", "not_liked"
+    ]
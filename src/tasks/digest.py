@@ -0,0 +1,100 @@
+"""
+Накопление уведомлений о лайках для отправки дайджестом.
+
+Лайки складываются в Redis-список автора поста (из таблицы outbox, см.
+src.tasks.outbox), периодическая задача
+flush_like_digests (Celery beat) забирает накопленное и отправляет одно письмо
+на автора. Число дайджестов автору в час ограничено setting.digest.max_per_hour,
+при превышении лайки продолжают копиться до следующего часа. Если письмо не
+отправлено, лайки возвращаются в дайджест до следующего запуска задачи.
+"""
+
+import json
+import time
+from typing import Iterable
+
+import redis
+
+from src.core.config import setting
+from src.core.redis_client import get_redis
+
+DIGEST_PENDING = "like-digest:pending"
+DIGEST_ITEMS = "like-digest:items"
+DIGEST_SENT = "like-digest:sent"
+
+
+def digest_items_key(email: str) -> str:
+    return f"{DIGEST_ITEMS}:{email}"
+
+
+def digest_sent_key(email: str) -> str:
+    return f"{DIGEST_SENT}:{email}:{int(time.time() // 3600)}"
+
+
+async def enqueue_like_digests(infos_about_like: Iterable[dict[str, str]]) -> None:
+    """
+        Добавляет лайки в дайджесты авторов постов (одна транзакция Redis)
+    :param infos_about_like: Iterable[dict[str, str]]
+        данные PostInfo
+    :raise RedisError:
+        если Redis недоступен
+    """
+    async with get_redis().pipeline(transaction=True) as pipe:
+        for info_about_like in infos_about_like:
+            email: str = info_about_like["email"]
+            pipe.rpush(digest_items_key(email), json.dumps(info_about_like))
+            pipe.sadd(DIGEST_PENDING, email)
+        await pipe.execute()
+
+
+def get_pending_emails(client: redis.Redis) -> list[str]:
+    """
+    Авторы, у которых есть накопленные лайки
+    """
+    return list(client.smembers(DIGEST_PENDING))
+
+
+def reserve_digest(client: redis.Redis, email: str) -> bool:
+    """
+        Учитывает отправку дайджеста автору в текущем часе
+    :return: bool
+        False, если лимит дайджестов в час исчерпан
+    """
+    key: str = digest_sent_key(email)
+    with client.pipeline(transaction=True) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, 3600)
+        count, _ = pipe.execute()
+    return count <= setting.digest.max_per_hour
+
+
+def pop_digest_items(client: redis.Redis, email: str) -> list[dict[str, str]]:
+    """
+    Атомарно забирает накопленные лайки автора
+    """
+    key: str = digest_items_key(email)
+    with client.pipeline(transaction=True) as pipe:
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        pipe.srem(DIGEST_PENDING, email)
+        items, _, _ = pipe.execute()
+    return [json.loads(item) for item in items]
+
+
+def restore_digest(client: redis.Redis, email: str, items: list[dict[str, str]]) -> None:
+    """
+        Возвращает неотправленные лайки в начало дайджеста автора и отменяет
+        учет отправки в текущем часе (reserve_digest)
+    :param items: list[dict[str, str]]
+        лайки, полученные из pop_digest_items
+    """
+    key: str = digest_sent_key(email)
+    with client.pipeline(transaction=True) as pipe:
+        if items:
+            pipe.lpush(
+                digest_items_key(email), *(json.dumps(item) for item in reversed(items))
+            )
+            pipe.sadd(DIGEST_PENDING, email)
+        pipe.decr(key)
+        pipe.expire(key, 3600)
+        pipe.execute()
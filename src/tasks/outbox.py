@@ -0,0 +1,118 @@
+"""
+Доставка уведомлений из таблицы outbox в Redis.
+
+Запись outbox добавляется в той же транзакции, что и лайк или пост (add_like_post,
+add_new_post), поэтому
+обработчик запроса не обращается к брокеру и не зависит от его доступности.
+Фоновая задача run_outbox_relay (запускается в lifespan приложения) забирает
+записи пачками, передает лайки в дайджесты, публикует события о постах и лайках
+для WebSocket-клиентов (src.posts.realtime) и удаляет записи в той же транзакции БД.
+Если Redis недоступен, транзакция откатывается и записи доставляются позже
+(доставка "хотя бы один раз").
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import setting
+from src.posts.models import Outbox
+from src.posts.realtime import publish_events
+from src.tasks.digest import enqueue_like_digests
+
+logger = logging.getLogger(__name__)
+
+TOPIC_LIKE = "like"
+TOPIC_POST = "post"
+
+_wakeup = asyncio.Event()
+
+
+def wake_outbox_relay() -> None:
+    """
+    Сообщает relay о новых записях (без ожидания периода опроса)
+    """
+    _wakeup.set()
+
+
+async def relay_outbox_batch(
+    session_maker: async_sessionmaker[AsyncSession],
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+        Доставляет одну пачку записей outbox
+    :param session_maker: async_sessionmaker[AsyncSession]
+        фабрика сессий БД
+    :param batch_size: Optional[int]
+        размер пачки, по умолчанию setting.outbox.batch_size
+    :return: int
+        количество обработанных записей
+    :raise RedisError, SQLAlchemyError:
+        записи остаются в outbox
+    """
+    async with session_maker() as session:
+        # SKIP LOCKED (PostgreSQL): несколько воркеров не забирают одни и те же записи
+        res = await session.execute(
+            select(Outbox.id, Outbox.topic, Outbox.payload)
+            .order_by(Outbox.id)
+            .limit(batch_size or setting.outbox.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = res.all()
+        if not rows:
+            return 0
+
+        likes: list[dict[str, str]] = list()
+        events: list[dict] = list()
+        for row in rows:
+            if row.topic == TOPIC_LIKE:
+                likes.append(row.payload)
+                # email автора не публикуется
+                events.append(
+                    {
+                        "type": "like",
+                        "id_post": row.payload.get("id_post"),
+                        "user": row.payload["name_friend"],
+                    }
+                )
+            elif row.topic == TOPIC_POST:
+                events.append({"type": "post", **row.payload})
+            else:
+                logger.warning(
+                    "Drop outbox message %d with unknown topic %s", row.id, row.topic
+                )
+        if likes:
+            await enqueue_like_digests(likes)
+        if events:
+            await publish_events(events)
+
+        await session.execute(
+            delete(Outbox).where(Outbox.id.in_([row.id for row in rows]))
+        )
+        await session.commit()
+    logger.info("Relayed %d outbox messages", len(rows))
+    return len(rows)
+
+
+async def run_outbox_relay(session_maker: async_sessionmaker[AsyncSession]) -> None:
+    """
+    Фоновая задача: разбирает outbox, пока есть полные пачки, затем ждет новых записей
+    """
+    while True:
+        try:
+            relayed: int = await relay_outbox_batch(session_maker)
+        except (RedisError, SQLAlchemyError):
+            logger.warning("Error relay outbox messages", exc_info=True)
+            relayed = 0
+        if relayed >= setting.outbox.batch_size:
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), setting.outbox.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
@@ -0,0 +1,176 @@
+import logging
+import os
+import queue
+import smtplib
+import time
+from email.message import EmailMessage
+from typing import Iterable, Optional
+
+from src.core.config import setting, setting_conn
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+    Пул авторизованных SMTP-соединений (STARTTLS и LOGIN выполняются один раз
+    на соединение, а не на каждое письмо)
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        size: int,
+        max_idle: float,
+        timeout: float,
+    ) -> None:
+        """
+        :param size: int
+            максимальное число простаивающих соединений в пуле
+        :param max_idle: float
+            после такого простоя (сек.) соединение проверяется командой NOOP
+        :param timeout: float
+            таймаут сокета (сек.)
+        """
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[tuple[smtplib.SMTP, float]] = queue.LifoQueue(
+            maxsize=size
+        )
+
+    def _connect(self) -> smtplib.SMTP:
+        logger.info("Open SMTP connection to %s:%d", self.host, self.port)
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.starttls()
+            conn.login(self.user, self.password)
+        except (smtplib.SMTPException, OSError):
+            self._close(conn)
+            raise
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    @staticmethod
+    def _is_alive(conn: smtplib.SMTP) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self) -> smtplib.SMTP:
+        """
+        Возвращает рабочее соединение из пула или открывает новое
+        """
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.max_idle or self._is_alive(conn):
+                return conn
+            logger.info("Drop stale SMTP connection")
+            self._close(conn)
+
+    def release(self, conn: smtplib.SMTP) -> None:
+        """
+        Возвращает соединение в пул (лишние соединения закрываются)
+        """
+        try:
+            self._idle.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            self._close(conn)
+
+    @staticmethod
+    def _send_one(conn: smtplib.SMTP, email: EmailMessage) -> bool:
+        """
+        Отправляет письмо; False, если сервер отклонил его (соединение остается рабочим)
+        """
+        try:
+            conn.send_message(email)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            logger.warning("Error send mail to %s", email["To"], exc_info=True)
+            return False
+        return True
+
+    def send_many(self, emails: Iterable[EmailMessage]) -> int:
+        """
+            Отправляет письма через одно соединение. При обрыве соединения
+            открывается новое и отправка письма повторяется один раз
+        :param emails: Iterable[EmailMessage]
+            письма
+        :return: int
+            количество отправленных писем
+        """
+        sent = 0
+        conn: Optional[smtplib.SMTP] = self.acquire()
+        try:
+            for email in emails:
+                try:
+                    delivered: bool = self._send_one(conn, email)
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    logger.warning("SMTP connection lost, reconnect")
+                    conn.close()
+                    conn = None
+                    conn = self._connect()
+                    delivered = self._send_one(conn, email)
+                sent += delivered
+        except BaseException:
+            if conn is not None:
+                self._close(conn)
+            raise
+        self.release(conn)
+        return sent
+
+    def send(self, email: EmailMessage) -> None:
+        self.send_many([email])
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+
+_pool: Optional[SMTPPool] = None
+_pool_pid: Optional[int] = None
+
+
+def get_smtp_pool() -> SMTPPool:
+    """
+    Пул текущего процесса: воркеры Celery (prefork) не должны делить сокеты родителя
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = SMTPPool(
+            host=setting_conn.SMTP_HOST,
+            port=setting_conn.SMTP_PORT,
+            user=setting_conn.SMTP_USER,
+            password=setting_conn.SMTP_PASSWORD,
+            size=setting.smtp_pool.size,
+            max_idle=setting.smtp_pool.max_idle,
+            timeout=setting.smtp_pool.timeout,
+        )
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def close_smtp_pool() -> None:
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close_all()
+    _pool = None
@@ -3,15 +3,31 @@ import smtplib
 from email.message import EmailMessage
 
 from celery import Celery
+from celery.signals import setup_logging as celery_setup_logging
+from celery.signals import worker_process_init, worker_process_shutdown
 
-from src.core.config import setting_conn, configure_logging
-from src.posts.schemas import PostInfo
+from src.core.config import setting, setting_conn
+from src.core.log import setup_logging
+from src.core.redis_client import get_sync_redis
+from src.tasks.digest import (
+    get_pending_emails,
+    pop_digest_items,
+    reserve_digest,
+    restore_digest,
+)
+from src.tasks.smtp_pool import close_smtp_pool, get_smtp_pool
 
 celery = Celery(
     "tasks", broker=f"redis://{setting_conn.REDIS_HOST}:{setting_conn.REDIS_PORT}"
 )
 
-configure_logging(logging.INFO)
+celery.conf.beat_schedule = {
+    "flush-like-digests": {
+        "task": "src.tasks.tasks.flush_like_digests",
+        "schedule": setting.digest.window,
+    },
+}
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,14 +50,104 @@ def get_email_for_send(info_about_like: dict[str, str]):
     return email
 
 
+def get_digest_email_for_send(likes: list[dict[str, str]]):
+    """
+        Письмо-дайджест автору: все лайки, накопленные за окно setting.digest.window
+    :param likes: list[dict[str, str]]
+        данные PostInfo одного автора
+    """
+    max_items: int = setting.digest.max_items
+    email = EmailMessage()
+    email["Subject"] = f"Ваши посты отмечены {len(likes)} раз"
+    email["From"] = setting_conn.SMTP_USER
+    email["To"] = likes[0]["email"]
+
+    items: str = "".join(
+        f"<li>{info['name_friend']} отметил пост на тему {info['title_post']}</li>"
+        for info in likes[:max_items]
+    )
+    more: str = (
+        f"<p>и еще {len(likes) - max_items} отметок</p>" if len(likes) > max_items else ""
+    )
+    email.set_content(
+        "<div>"
+        f'<h1 style="color: red;">Здравствуйте, {likes[0]["name_user"]}, '
+        "ваши посты были отмечены 😊</h1>"
+        f"<ul>{items}</ul>{more}"
+        "</div>",
+        subtype="html",
+    )
+    return email
+
+
+@celery_setup_logging.connect
+def configure_worker_logging(**kwargs) -> None:
+    # обработчик сигнала отключает настройку логирования самим Celery
+    setup_logging()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    # соединения и поток вывода логов родительского процесса не переиспользуются
+    # после fork
+    close_smtp_pool()
+    setup_logging()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    close_smtp_pool()
+
+
 @celery.task(serializer="json")
 def send_email(info_about_like: dict[str, str]):
-    logger.info(f"Start send email to {info_about_like['email']}")
+    logger.info("Start send email to %s", info_about_like["email"])
     email = get_email_for_send(info_about_like)
-    with smtplib.SMTP(setting_conn.SMTP_HOST, setting_conn.SMTP_PORT) as server:
+    try:
+        get_smtp_pool().send(email)
+    except (smtplib.SMTPException, OSError) as exp:
+        logger.exception("Error send mail, %s", exp)
+
+
+@celery.task(serializer="json")
+def send_email_batch(infos_about_like: list[dict[str, str]]):
+    """
+    Отправка нескольких писем через одно SMTP-соединение
+    """
+    logger.info("Start send %d emails", len(infos_about_like))
+    emails = [get_email_for_send(info) for info in infos_about_like]
+    try:
+        sent: int = get_smtp_pool().send_many(emails)
+    except (smtplib.SMTPException, OSError) as exp:
+        logger.exception("Error send mails, %s", exp)
+    else:
+        logger.info("Sent %d of %d emails", sent, len(emails))
+
+
+@celery.task
+def flush_like_digests():
+    """
+    Периодическая задача: отправка накопленных лайков дайджестами (по письму на
+    автора). Лайки автора, письмо которому не отправлено, возвращаются в дайджест
+    """
+    client = get_sync_redis()
+    pool = get_smtp_pool()
+    sent = 0
+    for author_email in get_pending_emails(client):
+        if not reserve_digest(client, author_email):
+            logger.info("Digest limit reached for %s", author_email)
+            continue
+        likes: list[dict[str, str]] = pop_digest_items(client, author_email)
+        if not likes:
+            restore_digest(client, author_email, likes)
+            continue
         try:
-            server.starttls()
-            server.login(setting_conn.SMTP_USER, setting_conn.SMTP_PASSWORD)
-            server.send_message(email)
-        except smtplib.SMTPException as exp:
-            logger.exception(f"Error send mail, {exp}")
+            # соединение с SMTP-сервером переиспользуется пулом между письмами
+            pool.send(get_digest_email_for_send(likes))
+        except (smtplib.SMTPException, OSError) as exp:
+            logger.exception("Error send like digest to %s, %s", author_email, exp)
+            restore_digest(client, author_email, likes)
+        else:
+            sent += 1
+    if sent:
+        logger.info("Sent %d like digests", sent)
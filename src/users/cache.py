@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from src.core.config import setting
+from src.core.metrics import USER_CACHE_LOOKUPS
+from src.core.redis_client import get_redis
+from src.core.ttl_cache import TTLCache
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_INVALIDATE_CHANNEL = "users:invalidate"
+
+user_cache = TTLCache(maxsize=setting.user_cache.maxsize, ttl=setting.user_cache.ttl)
+
+# ссылки на фоновые задачи публикации, чтобы их не собрал сборщик мусора
+_publish_tasks: set[asyncio.Task] = set()
+
+
+def get_cached_user(id_user: int) -> Optional[User]:
+    """
+        Возвращает пользователя из кеша процесса
+    :param id_user: int
+        id пользователя
+    :return: Optional[User]
+        новый (не привязанный к сессии) объект User или None
+    """
+    row: Optional[dict[str, Any]] = user_cache.get(id_user)
+    USER_CACHE_LOOKUPS.labels("miss" if row is None else "hit").inc()
+    if row is None:
+        return None
+    return User(**row)
+
+
+def cache_user(user: User) -> None:
+    """
+        Сохраняет данные пользователя в кеше процесса
+    :param user: User
+        пользователь
+    """
+    row: dict[str, Any] = {
+        attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs
+    }
+    user_cache.set(user.id, row)
+
+
+def invalidate_user(id_user: int) -> None:
+    """
+        Удаляет пользователя из кеша процесса и оповещает остальные воркеры через Redis
+    :param id_user: int
+        id пользователя
+    """
+    user_cache.pop(id_user)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # вне event loop (скрипты, миграции) оповещать некого
+        return
+    task: asyncio.Task = loop.create_task(_publish_invalidation(id_user))
+    _publish_tasks.add(task)
+    task.add_done_callback(_publish_tasks.discard)
+
+
+async def _publish_invalidation(id_user: int) -> None:
+    try:
+        await get_redis().publish(USER_INVALIDATE_CHANNEL, str(id_user))
+    except RedisError:
+        logger.warning("Error publish invalidation for user %d", id_user)
+
+
+async def listen_user_invalidation() -> None:
+    """
+    Подписка на оповещения об изменении пользователей (запускается в lifespan приложения)
+    """
+    while True:
+        try:
+            async with get_redis().pubsub() as pubsub:
+                await pubsub.subscribe(USER_INVALIDATE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        user_cache.pop(int(message["data"]))
+        except RedisError:
+            logger.warning("Lost subscription to %s, retry", USER_INVALIDATE_CHANNEL)
+            # за время без подписки оповещения могли быть потеряны
+            user_cache.clear()
+            await asyncio.sleep(1)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target: User) -> None:
+    session: Optional[Session] = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for id_user in session.info.pop("changed_users", ()):
+        invalidate_user(id_user)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_users", None)
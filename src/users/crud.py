@@ -6,39 +6,41 @@ from sqlalchemy.engine import Result
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.config import configure_logging
 from src.core.exceptions import ExceptDB, NotFindUser
-from src.core.jwt_utils import create_hash_password
+from src.core.jwt_utils import create_hash_password_async
 from src.users.models import User
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
+# поиск пользователя выполняется на каждом входе и промахе кеша пользователей:
+# записи выводятся выборочно (setting.logging.sampling)
+lookup_logger = logging.getLogger(f"{__name__}.lookup")
 
 
 async def get_user_from_db(session: AsyncSession, email: str) -> User:
-    logger.info("Start find user by email: %s", email)
     stmt = select(User).where(User.email == email)
     res: Result = await session.execute(stmt)
     user: Optional[User] = res.scalars().one_or_none()
     if not user:
-        logger.info("User not find")
+        lookup_logger.info("User not found by email %s", email)
         raise NotFindUser(f"Not find user by email {email}")
-    logger.info("User has benn found")
+    lookup_logger.info("User %d found by email", user.id)
     return user
 
 
 async def get_user_by_id(session: AsyncSession, id_user: int) -> User:
-    logger.info("Start find user by id %s", id_user)
     stmt = select(User).where(User.id == id_user)
     res: Result = await session.execute(stmt)
     user: User = res.scalars().first()
-    logger.info("User by id %s", user.email)
+    if user is None:
+        lookup_logger.info("User %d not found", id_user)
+        raise NotFindUser(f"Not find user by id {id_user}")
+    lookup_logger.info("User %d found", id_user)
     return user
 
 
-def create_user(username: str, email: str, password: str) -> User:
+async def create_user(username: str, email: str, password: str) -> User:
     logger.info("Start create user with email %s", email)
-    hash_password = create_hash_password(password).decode()
+    hash_password = (await create_hash_password_async(password)).decode()
     user: User = User(
         username=username,
         email=email,
@@ -54,8 +56,8 @@ async def add_user_to_db(session: AsyncSession, user: User) -> int:
     try:
         session.add(user)
         await session.commit()
-    except SQLAlchemyError as exc:
-        logger.exception(exc)
+    except SQLAlchemyError:
+        logger.exception("Error add new user")
         await session.rollback()
         raise ExceptDB("Error in DB")
     else:
@@ -1,12 +1,16 @@
+from typing import Optional
+
 import jwt
 from fastapi import Depends, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import APIKeyCookie, APIKeyHeader
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.core.config import COOKIE_NAME
 from src.core.database import get_async_session
+from src.core.exceptions import NotFindUser
 from src.core.jwt_utils import decode_jwt
+from src.users.cache import cache_user, get_cached_user
 from src.users.crud import get_user_by_id
 from src.users.models import User
 
@@ -33,9 +37,54 @@ async def current_active_user(
         )
 
     id_user: int = int(payload["sub"])
-    user: User = await get_user_by_id(session=session, id_user=id_user)
+    user: Optional[User] = get_cached_user(id_user)
+    if user is None:
+        try:
+            user = await get_user_by_id(session=session, id_user=id_user)
+        except NotFindUser:
+            # токен пользователя, удаленного после выдачи токена
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authorized"
+            )
+        cache_user(user)
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not activate"
         )
     return user
+
+
+async def current_superuser(user: User = Depends(current_active_user)) -> User:
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Superuser required"
+        )
+    return user
+
+
+async def websocket_user(
+    token: Optional[str], session_maker: async_sessionmaker[AsyncSession]
+) -> Optional[User]:
+    """
+        Пользователь WebSocket-соединения по cookie COOKIE_NAME (сессия БД нужна только
+        при промахе кеша и не удерживается на время соединения)
+    :return: Optional[User]
+        None, если токен отсутствует, недействителен или пользователь не активен
+    """
+    if token is None:
+        return None
+    try:
+        payload = decode_jwt(token)
+    except jwt.InvalidTokenError:
+        return None
+
+    id_user: int = int(payload["sub"])
+    user: Optional[User] = get_cached_user(id_user)
+    if user is None:
+        async with session_maker() as session:
+            try:
+                user = await get_user_by_id(session=session, id_user=id_user)
+            except NotFindUser:
+                return None
+        cache_user(user)
+    return user if user.is_active else None
@@ -1,3 +1,5 @@
+from typing import Callable, Literal
+
 from fastapi import APIRouter, Depends, Form, Request, Response, status
 from fastapi.exceptions import HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse
@@ -5,14 +7,15 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import COOKIE_NAME, templates
-from src.core.database import get_async_session
-from src.core.exceptions import ExceptDB, NotFindUser
-from src.core.jwt_utils import (create_jwt, set_cookie,
-                                validate_password)
-from src.posts.crud import get_post_with_user_from_db
-from src.posts.schemas import PostWithAutor
+from src.core.database import engine, get_async_session, pool_stats
+from src.core.exceptions import ExceptBusy, ExceptDB, NotFindUser
+from src.core.hash_executor import hash_executor
+from src.core.jwt_utils import create_jwt, set_cookie, validate_password_async
+from src.core.rate_limit import RateLimit
+from src.posts.fragments import index_response
+from src.users.cache import user_cache
 from src.users.crud import add_user_to_db, create_user, get_user_from_db
-from src.users.depends import current_active_user
+from src.users.depends import current_active_user, current_superuser
 from src.users.models import User
 
 router = APIRouter(prefix="/users", tags=["User"])
@@ -32,17 +35,17 @@ async def logout(
     request: Request,
     session: AsyncSession = Depends(get_async_session),
 ):
-    posts: list[PostWithAutor] = await get_post_with_user_from_db(session=session)
-    response: Response = templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={"posts": posts},
-    )
+    response: Response = await index_response(request, session)
     response.delete_cookie(COOKIE_NAME)
     return response
 
 
-@router.post("/login", name="users:login", response_class=JSONResponse)
+@router.post(
+    "/login",
+    name="users:login",
+    response_class=JSONResponse,
+    dependencies=[Depends(RateLimit("login"))],
+)
 async def login(
     request: Request,
     data: OAuth2PasswordRequestForm = Depends(),
@@ -58,10 +61,18 @@ async def login(
             detail=f"User {username} not found",
         )
 
-    if not validate_password(
-        password=password,
-        hashed_password=user.hashed_password.encode(),
-    ):
+    try:
+        is_valid: bool = await validate_password_async(
+            password=password,
+            hashed_password=user.hashed_password.encode(),
+        )
+    except ExceptBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try later",
+            headers={"Retry-After": "1"},
+        )
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Error password for login: {username}",
@@ -69,18 +80,18 @@ async def login(
 
     access_token: str = create_jwt(str(user.id))
 
-    posts: list[PostWithAutor] = await get_post_with_user_from_db(session=session)
-    resp: Response = templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={"posts": posts},
-        status_code=status.HTTP_302_FOUND,
+    resp: Response = await index_response(
+        request, session, status_code=status.HTTP_302_FOUND
     )
     set_cookie(resp, access_token)
     return resp
 
 
-@router.post("/regdata", response_class=JSONResponse)
+@router.post(
+    "/regdata",
+    response_class=JSONResponse,
+    dependencies=[Depends(RateLimit("regdata"))],
+)
 async def regdata(
     request: Request,
     username=Form(),
@@ -92,7 +103,14 @@ async def regdata(
         # find_user: User = await get_user_from_db(email=email, session=session)
         await get_user_from_db(email=email, session=session)
     except NotFindUser:
-        user: User = create_user(username, email, password)
+        try:
+            user: User = await create_user(username, email, password)
+        except ExceptBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try later",
+                headers={"Retry-After": "1"},
+            )
     else:
         return templates.TemplateResponse(
             request=request,
@@ -121,3 +139,18 @@ async def regdata(
 @router.get("/protected-route")
 async def protected_route(user: User = Depends(current_active_user)):
     return f"Hello, USer {user.email}"
+
+
+# счетчики процесса, обслужившего запрос; по всем воркерам - в /metrics
+PROCESS_STATS: dict[str, Callable[[], dict]] = {
+    "cache": user_cache.stats,
+    "hash": hash_executor.stats,
+    "pool": lambda: pool_stats.stats(engine.sync_engine.pool),
+}
+
+
+@router.get("/{name}-stats")
+async def process_stats(
+    name: Literal["cache", "hash", "pool"], user: User = Depends(current_superuser)
+):
+    return PROCESS_STATS[name]()
@@ -1,12 +1,21 @@
 import asyncio
 from typing import AsyncGenerator, Generator
 
+import fakeredis
+import pytest
 import pytest_asyncio
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
                                     async_sessionmaker, create_async_engine)
 
-from src.core.database import Base, get_async_session
+from src.core.config import setting
+from src.core.database import (Base, get_async_session, get_read_session,
+                               get_read_session_maker, get_session_maker)
+from src.core.redis_client import get_redis, set_redis, set_sync_redis
 from src.main import app
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///test.sqlite3"
@@ -22,6 +31,35 @@ def event_loop(request) -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def enforce_query_budget() -> None:
+    """
+    Превышение бюджета SQL-запросов маршрута и N+1 в тестах - ошибка
+    """
+    setting.query_budget.enabled = True
+    setting.query_budget.mode = "raise"
+
+
+@pytest.fixture(scope="session")
+def fake_redis_server() -> FakeServer:
+    return FakeServer()
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(fake_redis_server: FakeServer) -> FakeRedis:
+    """
+    Redis в памяти процесса вместо сервера (кеш, теги, pub/sub). Клиенты создаются
+    для каждого теста, так как соединения привязаны к event loop теста
+    """
+    set_redis(FakeRedis(server=fake_redis_server, decode_responses=True))
+    set_redis(FakeRedis(server=fake_redis_server), decode_responses=False)
+    set_sync_redis(fakeredis.FakeRedis(server=fake_redis_server, decode_responses=True))
+    FastAPICache.init(
+        RedisBackend(get_redis(decode_responses=False)), prefix="fastapi-cache"
+    )
+    return get_redis()
+
+
 @pytest_asyncio.fixture(loop_scope="session", scope="session")
 async def db_engine() -> AsyncGenerator[AsyncEngine, None]:
     engine: AsyncEngine = create_async_engine(SQLALCHEMY_DATABASE_URL)
@@ -56,7 +94,20 @@ def override_get_db(db_session: AsyncSession):
 
 
 @pytest_asyncio.fixture(loop_scope="function", scope="function")
-async def client(override_get_db) -> AsyncGenerator[AsyncClient, None]:
+def override_get_session_maker(db_engine: AsyncEngine):
+    def _override_get_session_maker():
+        return async_sessionmaker(db_engine, expire_on_commit=False)
+
+    return _override_get_session_maker
+
+
+@pytest_asyncio.fixture(loop_scope="function", scope="function")
+async def client(
+    override_get_db, override_get_session_maker
+) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides[get_async_session] = override_get_db
+    app.dependency_overrides[get_read_session] = override_get_db
+    app.dependency_overrides[get_session_maker] = override_get_session_maker
+    app.dependency_overrides[get_read_session_maker] = override_get_session_maker
     async with AsyncClient(app=app, base_url="http://test") as c:
         yield c
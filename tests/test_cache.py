@@ -0,0 +1,30 @@
+import time
+
+from src.core.ttl_cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" становится самым старым
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "size": 2,
+        "maxsize": 2,
+    }
+
+
+def test_ttl_cache_expire():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=-1)
+    assert cache.get("a") is None
+    cache.set("b", 2)
+    cache._data["b"] = (time.monotonic() - 1, 2)
+    assert cache.get("b") is None
+    assert len(cache) == 0
@@ -0,0 +1,83 @@
+import smtplib
+from email.message import EmailMessage
+from typing import Iterable
+
+import pytest
+
+from src.core.config import setting
+from src.tasks import tasks
+from src.tasks.digest import enqueue_like_digests
+
+
+class FakePool:
+    def __init__(self) -> None:
+        self.sent: list[EmailMessage] = list()
+        self.fail = False
+
+    def send_many(self, emails: Iterable[EmailMessage]) -> int:
+        if self.fail:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.extend(emails)
+        return len(self.sent)
+
+    def send(self, email: EmailMessage) -> None:
+        self.send_many([email])
+
+
+@pytest.fixture
+def pool(monkeypatch) -> FakePool:
+    fake_pool = FakePool()
+    monkeypatch.setattr(tasks, "get_smtp_pool", lambda: fake_pool)
+    return fake_pool
+
+
+def like_info(email: str, friend: str) -> dict[str, str]:
+    return {
+        "title_post": "Test",
+        "name_user": "Srub",
+        "email": email,
+        "name_friend": friend,
+    }
+
+
+async def test_likes_coalesced_into_digest(pool: FakePool):
+    await enqueue_like_digests(
+        like_info("author@mail.ru", friend) for friend in ("Friend1", "Friend2", "Friend3")
+    )
+    await enqueue_like_digests([like_info("other@mail.ru", "Friend1")])
+
+    tasks.flush_like_digests()
+    assert sorted(email["To"] for email in pool.sent) == [
+        "author@mail.ru",
+        "other@mail.ru",
+    ]
+    digest = next(email for email in pool.sent if email["To"] == "author@mail.ru")
+    assert digest.get_content().count("<li>") == 3
+
+    tasks.flush_like_digests()
+    assert len(pool.sent) == 2
+
+
+async def test_digest_rate_cap(pool: FakePool, monkeypatch):
+    monkeypatch.setattr(setting.digest, "max_per_hour", 1)
+    await enqueue_like_digests([like_info("capped@mail.ru", "Friend1")])
+    tasks.flush_like_digests()
+    await enqueue_like_digests([like_info("capped@mail.ru", "Friend2")])
+    tasks.flush_like_digests()
+    assert len(pool.sent) == 1
+
+
+async def test_digest_kept_when_send_fails(pool: FakePool, monkeypatch):
+    monkeypatch.setattr(setting.digest, "max_per_hour", 1)
+    await enqueue_like_digests([like_info("failed@mail.ru", "Friend1")])
+    pool.fail = True
+    tasks.flush_like_digests()
+    assert pool.sent == []
+
+    await enqueue_like_digests([like_info("failed@mail.ru", "Friend2")])
+    pool.fail = False
+    tasks.flush_like_digests()
+    assert len(pool.sent) == 1
+    content: str = pool.sent[0].get_content()
+    assert content.count("<li>") == 2
+    assert content.index("Friend1") < content.index("Friend2")
@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.core.exceptions import ExceptBusy
+from src.core.hash_executor import HashExecutor
+
+
+async def test_hash_executor_rejects_when_saturated():
+    rejected: float = REGISTRY.get_sample_value("hash_executor_rejected_total")
+    executor = HashExecutor(workers=1, max_queue=1)
+    slow = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+    await asyncio.sleep(0)
+    with pytest.raises(ExceptBusy):
+        await executor.run(time.sleep, 0)
+    await slow
+
+    assert await executor.run(sum, [1, 2]) == 3
+    stats: dict = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["pending"] == 0
+    assert stats["max_pending"] == 1
+    assert stats["latency"]["count"] == 2
+    assert REGISTRY.get_sample_value("hash_executor_rejected_total") == rejected + 1
+    assert REGISTRY.get_sample_value("hash_executor_pending") == 0
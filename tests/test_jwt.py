@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from src.core.jwt_utils import create_jwt, decode_jwt, encode_jwt, token_cache
+
+
+def test_decode_jwt_cached():
+    token_cache.clear()
+    hits: int = token_cache.hits
+    token: str = create_jwt("1")
+    assert decode_jwt(token)["sub"] == "1"
+    assert len(token_cache) == 1
+
+    payload: dict = decode_jwt(token)
+    payload["sub"] = "2"  # изменение результата не портит кеш
+    assert decode_jwt(token)["sub"] == "1"
+    assert token_cache.hits - hits == 2
+
+
+def test_decode_jwt_expired_not_cached():
+    token_cache.clear()
+    payload: dict = {
+        "sub": "1",
+        "exp": datetime.now(timezone.utc) - timedelta(seconds=1),
+    }
+    token: str = encode_jwt(payload)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_jwt(token)
+    assert len(token_cache) == 0
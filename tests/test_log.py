@@ -0,0 +1,66 @@
+import json
+import logging
+import sys
+
+import pytest
+from httpx import AsyncClient
+
+from src.core import log
+from src.core.log import (JsonFormatter, LogQueueHandler, RequestIdFilter,
+                          SamplingFilter, request_id, setup_logging, stop_logging)
+
+
+def make_record(name: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, "Message %d", (1,), None)
+
+
+def test_sampling_filter():
+    sampling = SamplingFilter({"src.hot": 0.0})
+    assert not sampling.filter(make_record("src.hot"))
+    assert not sampling.filter(make_record("src.hot.child"))
+    assert sampling.filter(make_record("src.hot", logging.WARNING))
+    assert sampling.filter(make_record("src.hotter"))
+
+
+def test_json_record_with_request_id():
+    token = request_id.set("abc")
+    try:
+        record: logging.LogRecord = make_record("src.test")
+        RequestIdFilter().filter(record)
+    finally:
+        request_id.reset(token)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+    prepared = LogQueueHandler(None).prepare(record)
+
+    entry: dict = json.loads(JsonFormatter().format(prepared))
+    assert entry["message"] == "Message 1"
+    assert entry["request_id"] == "abc"
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_setup_logging(capsys: pytest.CaptureFixture):
+    root: logging.Logger = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    try:
+        setup_logging()
+        assert setup_logging() is log._listener
+        logging.getLogger("src.test").info("Queued %s", "record")
+        stop_logging()
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
+    entry: dict = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+    assert entry["message"] == "Queued record"
+    assert entry["request_id"] == "-"
+
+
+async def test_request_id_header(client: AsyncClient):
+    response = await client.get("/metrics")
+    assert len(response.headers["X-Request-ID"]) == 32
+    response = await client.get("/metrics", headers={"X-Request-ID": "req-1"})
+    assert response.headers["X-Request-ID"] == "req-1"
+    response = await client.get("/metrics", headers={"X-Request-ID": "bad id"})
+    assert response.headers["X-Request-ID"] != "bad id"
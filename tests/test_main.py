@@ -1,13 +1,23 @@
+import json
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from src.core.config import COOKIE_NAME
-from src.core.exceptions import ExceptDB
+from src.core.exceptions import ExceptCursor, ExceptDB, ExceptUser, NotFindPost
 from src.core.jwt_utils import create_hash_password, create_jwt
-from src.posts.crud import add_new_post
-from src.posts.models import Post
-from src.posts.schemas import PostCreate
+from src.posts.crud import (add_like_post, add_new_post, delete_like_post_db,
+                            get_post_with_user_from_db, reconcile_like_count)
+from src.posts.models import Outbox, Post
+from src.posts.schemas import PostCreate, PostPage
+from src.tasks import outbox
+from src.tasks.digest import DIGEST_PENDING
+from src.tasks.outbox import relay_outbox_batch
+from src.users.cache import cache_user, get_cached_user, user_cache
 from src.users.crud import add_user_to_db
 from src.users.models import User
 
@@ -63,6 +73,13 @@ async def test_create_new_post(client: AsyncClient):
     assert response.status_code == 307
 
 
+async def test_deleted_user_token_unauthorized(client: AsyncClient):
+    cookies = {COOKIE_NAME: create_jwt("100500")}  # пользователя нет в БД
+    post = {"title": "Test", "content": "Test post"}
+    response = await client.post("/posts/test", data=post, cookies=cookies)
+    assert response.status_code == 401
+
+
 async def test_endpoint_test(client: AsyncClient):
     post = {"title": "Test", "content": "Test post"}  # Данные для полей формы
     jwt: str = create_jwt("1")
@@ -77,3 +94,311 @@ async def test_add_new_post_bd(db_session: AsyncSession):
     await add_new_post(session=db_session, post=post, id_user=1)
     post_db: Post = await db_session.get(Post, 1)
     assert post_db.id == 1
+
+
+async def test_get_post_with_user_pagination(db_session: AsyncSession):
+    for num in range(3):
+        post: PostCreate = PostCreate(title=f"Page {num}", body="Test post")
+        await add_new_post(session=db_session, post=post, id_user=1)
+
+    ids: list[int] = list()
+    cursor = None
+    while True:
+        page: PostPage = await get_post_with_user_from_db(
+            session=db_session, cursor=cursor, limit=2
+        )
+        assert len(page.posts) <= 2
+        ids.extend(post.id for post in page.posts)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == len(set(ids)) == 4
+
+
+async def test_get_post_with_user_ordered_by_date(db_session: AsyncSession):
+    now: datetime = datetime.now(timezone.utc)
+    # id растет, а дата создания убывает: порядок ленты задает дата
+    dated: list[Post] = [
+        Post(
+            title="Dated",
+            body="Test post",
+            id_user=1,
+            date_creation=now - timedelta(days=num),
+        )
+        for num in range(3)
+    ]
+    db_session.add_all(dated)
+    await db_session.commit()
+    posts = (await get_post_with_user_from_db(session=db_session, limit=10)).posts
+    positions: list[int] = [[post.id for post in posts].index(post.id) for post in dated]
+    assert positions == sorted(positions)
+
+    first: Post = Post(title="Default", body="Test post", id_user=1)
+    db_session.add(first)
+    await db_session.commit()
+    second: Post = Post(title="Default", body="Test post", id_user=1)
+    db_session.add(second)
+    await db_session.commit()
+    assert first.date_creation < second.date_creation
+
+
+async def test_get_post_with_user_bad_cursor(db_session: AsyncSession):
+    with pytest.raises(ExceptCursor):
+        await get_post_with_user_from_db(session=db_session, cursor="not-a-cursor")
+
+
+async def test_main_index_pages(client: AsyncClient):
+    response = await client.get("/")
+    assert response.status_code == 200
+    response = await client.get("/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_like_count_maintained(db_session: AsyncSession):
+    friend: User = User(
+        username="Friend",
+        email="friend@mail.ru",
+        hashed_password=create_hash_password(PASSWORD).decode(),
+        is_active=True,
+        is_superuser=False,
+    )
+    id_friend: int = await add_user_to_db(db_session, friend)
+
+    await add_like_post(session=db_session, id_post=1, id_user=id_friend)
+    like_count = await db_session.scalar(select(Post.like_count).where(Post.id == 1))
+    assert like_count == 1
+
+    assert await delete_like_post_db(session=db_session, id_post=1, id_user=id_friend)
+    like_count = await db_session.scalar(select(Post.like_count).where(Post.id == 1))
+    assert like_count == 0
+
+
+async def test_reconcile_like_count(db_session: AsyncSession):
+    await db_session.execute(update(Post).where(Post.id == 1).values(like_count=5))
+    await db_session.commit()
+    assert await reconcile_like_count(db_session) == 1
+    like_count = await db_session.scalar(select(Post.like_count).where(Post.id == 1))
+    assert like_count == 0
+
+
+async def test_like_post_errors(db_session: AsyncSession):
+    id_friend: int = 2
+    await add_like_post(session=db_session, id_post=1, id_user=id_friend)
+    with pytest.raises(ExceptUser):
+        await add_like_post(session=db_session, id_post=1, id_user=id_friend)
+    with pytest.raises(ExceptUser):
+        await add_like_post(session=db_session, id_post=1, id_user=1)
+    with pytest.raises(NotFindPost):
+        await add_like_post(session=db_session, id_post=1000, id_user=id_friend)
+
+    assert await delete_like_post_db(session=db_session, id_post=1, id_user=id_friend)
+    assert not await delete_like_post_db(
+        session=db_session, id_post=1, id_user=id_friend
+    )
+    like_count = await db_session.scalar(select(Post.like_count).where(Post.id == 1))
+    assert like_count == 0
+
+
+async def test_like_outbox_relay(
+    db_session: AsyncSession, db_engine: AsyncEngine, fake_redis, monkeypatch
+):
+    await add_like_post(session=db_session, id_post=1, id_user=2)
+    assert await db_session.scalar(select(func.count()).select_from(Outbox))
+    session_maker = async_sessionmaker(db_engine, expire_on_commit=False)
+
+    async def broker_down(infos):
+        raise RedisError()
+
+    monkeypatch.setattr(outbox, "enqueue_like_digests", broker_down)
+    with pytest.raises(RedisError):
+        await relay_outbox_batch(session_maker)
+    assert await db_session.scalar(select(func.count()).select_from(Outbox))
+
+    monkeypatch.undo()
+    events: list[dict] = list()
+
+    async def capture_events(batch):
+        events.extend(batch)
+
+    monkeypatch.setattr(outbox, "publish_events", capture_events)
+    while await relay_outbox_batch(session_maker, batch_size=1):
+        pass
+    assert {"type": "like", "id_post": 1, "user": "Friend"} in events
+    assert await db_session.scalar(select(func.count()).select_from(Outbox)) == 0
+    assert await fake_redis.sismember(DIGEST_PENDING, EMAIL)
+    assert await delete_like_post_db(session=db_session, id_post=1, id_user=2)
+
+
+async def test_bulk_likes(client: AsyncClient, db_session: AsyncSession):
+    post: PostCreate = PostCreate(title="Friend post", body="Test post")
+    await add_new_post(session=db_session, post=post, id_user=2)
+    id_post: int = await db_session.scalar(select(func.max(Post.id)))
+    cookies = {COOKIE_NAME: create_jwt("1")}
+
+    response = await client.post(
+        "/posts/likes/",
+        json={"like": [id_post, 1, 1000], "unlike": [id_post - 1]},
+        cookies=cookies,
+    )
+    assert response.status_code == 200
+    assert [item["result"] for item in response.json()["result"]] == [
+        "liked",
+        "own_post",
+        "not_found",
+        "not_liked",
+    ]
+    like_count = await db_session.scalar(select(Post.like_count).where(Post.id == id_post))
+    assert like_count == 1
+
+    response = await client.post(
+        "/posts/likes/", json={"like": [id_post], "unlike": [id_post]}, cookies=cookies
+    )
+    assert response.status_code == 400
+
+    response = await client.post(
+        "/posts/likes/", json={"unlike": [id_post]}, cookies=cookies
+    )
+    assert response.json()["result"] == [
+        {"id": id_post, "action": "unlike", "result": "unliked"}
+    ]
+    like_count = await db_session.scalar(select(Post.like_count).where(Post.id == id_post))
+    assert like_count == 0
+
+
+async def test_search_posts(client: AsyncClient, db_session: AsyncSession):
+    for title, body in (
+        ("Про котов", "Рыжие"),
+        ("Заметка", "Сегодня видел котов во дворе"),
+        ("Погода", "Дождь"),
+    ):
+        await add_new_post(
+            session=db_session, post=PostCreate(title=title, body=body), id_user=1
+        )
+
+    response = await client.get("/posts/search/", params={"q": 'котов"*'})
+    assert response.status_code == 200
+    page = response.json()
+    assert [post["title"] for post in page["posts"]] == ["Про котов", "Заметка"]
+    assert page["next_offset"] is None
+
+    response = await client.get("/posts/search/", params={"q": "котов", "limit": 1})
+    assert response.json()["next_offset"] == 1
+    response = await client.get(
+        "/posts/search/", params={"q": "котов", "limit": 1, "offset": 1}
+    )
+    assert response.json()["posts"][0]["title"] == "Заметка"
+
+    response = await client.get("/posts/search/", params={"q": "собак"})
+    assert response.json()["posts"] == []
+
+
+async def test_user_cache_invalidated_on_update(db_session: AsyncSession):
+    user: User = User(
+        username="Cached",
+        email="cached@mail.ru",
+        hashed_password="hash",
+        is_active=True,
+        is_superuser=False,
+    )
+    await add_user_to_db(db_session, user)
+    cache_user(user)
+    cached: User = get_cached_user(user.id)
+    assert cached.email == user.email
+    assert cached is not user
+
+    user.is_active = False
+    await db_session.commit()
+    assert user.id not in user_cache._data
+    assert get_cached_user(user.id) is None
+
+
+async def test_login(client: AsyncClient):
+    data = {"username": EMAIL, "password": PASSWORD}
+    response = await client.post("/users/login", data=data)
+    assert response.status_code == 302
+    assert COOKIE_NAME in response.cookies
+
+    data = {"username": EMAIL, "password": "wrong"}
+    response = await client.post("/users/login", data=data)
+    assert response.status_code == 401
+
+
+async def test_feed_cache_invalidated_by_new_post(
+    client: AsyncClient, db_session: AsyncSession
+):
+    cookies = {COOKIE_NAME: create_jwt("1")}
+    response = await client.get("/posts/users/", cookies=cookies)
+    assert response.headers["X-FastAPI-Cache"] == "MISS"
+    response = await client.get("/posts/users/", cookies=cookies)
+    assert response.headers["X-FastAPI-Cache"] == "HIT"
+
+    post: PostCreate = PostCreate(title="Fresh", body="Test post")
+    await add_new_post(session=db_session, post=post, id_user=1)
+    response = await client.get("/posts/users/", cookies=cookies)
+    assert response.headers["X-FastAPI-Cache"] == "MISS"
+    assert response.json()["posts"][0]["title"] == "Fresh"
+
+
+async def test_get_all_posts_stream(client: AsyncClient, db_session: AsyncSession):
+    total: int = len((await client.get("/posts/")).json())
+
+    response = await client.get("/posts/", params={"stream": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == total
+    assert json.loads(lines[0])["id"] == 1
+
+    response = await client.get("/posts/", params={"stream": "json"})
+    assert [post["id"] for post in response.json()] == list(range(1, total + 1))
+
+
+async def test_posts_json_responses(client: AsyncClient, db_session: AsyncSession):
+    response = await client.get("/posts/")
+    assert response.headers["content-type"] == "application/json"
+    posts: list[dict] = response.json()
+    assert list(posts[0]) == [
+        "id",
+        "title",
+        "body",
+        "date_creation",
+        "id_user",
+        "like_count",
+    ]
+    # сортировка по убыванию id
+    assert posts[0]["id"] > posts[-1]["id"]
+
+    cookies = {COOKIE_NAME: create_jwt("1")}
+    response = await client.get("/posts/1", cookies=cookies)
+    assert response.status_code == 200
+    assert {post["id_user"] for post in response.json()} == {1}
+    response = await client.get("/posts/1", cookies=cookies)
+    assert response.headers["X-FastAPI-Cache"] == "HIT"
+    assert {post["id_user"] for post in response.json()} == {1}
+
+    response = await client.get("/posts/hot/", params={"limit": 1})
+    assert list(response.json()[0]) == [
+        "id",
+        "user",
+        "title",
+        "body",
+        "data_create",
+        "like_count",
+    ]
+
+
+async def test_main_index_etag(client: AsyncClient, db_session: AsyncSession):
+    response = await client.get("/")
+    etag: str = response.headers["ETag"]
+    assert "Тема: Fresh" in response.text
+
+    response = await client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    post: PostCreate = PostCreate(title="Newest", body="Test post")
+    await add_new_post(session=db_session, post=post, id_user=1)
+    response = await client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "Тема: Newest" in response.text
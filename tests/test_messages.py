@@ -0,0 +1,106 @@
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import COOKIE_NAME
+from src.core.jwt_utils import create_jwt
+from src.users.models import User
+
+
+def cookies(id_user: int) -> dict[str, str]:
+    return {COOKIE_NAME: create_jwt(str(id_user))}
+
+
+async def create_users(db_session: AsyncSession, name: str) -> list[int]:
+    users: list[User] = [
+        User(
+            username=f"{name}{num}",
+            email=f"{name.lower()}{num}@mail.ru",
+            hashed_password="hash",
+            is_active=True,
+            is_superuser=False,
+        )
+        for num in range(3)
+    ]
+    db_session.add_all(users)
+    await db_session.commit()
+    return [user.id for user in users]
+
+
+async def test_direct_messages(client: AsyncClient, db_session: AsyncSession):
+    first, second, outsider = await create_users(db_session, "Talker")
+
+    response = await client.post(
+        "/messages/conversations", json={"participants": [second]}, cookies=cookies(first)
+    )
+    assert response.status_code == 201
+    conversation: dict = response.json()
+    assert conversation["participants"] == [first, second]
+    # один диалог на пару пользователей
+    response = await client.post(
+        "/messages/conversations", json={"participants": [first]}, cookies=cookies(second)
+    )
+    assert response.json()["id"] == conversation["id"]
+
+    url: str = f"/messages/conversations/{conversation['id']}"
+    for num in range(3):
+        response = await client.post(
+            url, json={"body": f"Message {num}"}, cookies=cookies(first)
+        )
+        assert response.status_code == 201
+
+    response = await client.get("/messages/unread", cookies=cookies(second))
+    assert response.json() == {
+        "total": 3,
+        "conversations": {str(conversation["id"]): 3},
+    }
+    response = await client.get("/messages/unread", cookies=cookies(first))
+    assert response.json()["total"] == 0
+    response = await client.get("/messages/conversations", cookies=cookies(second))
+    inbox: dict = response.json()[0]
+    assert inbox["id"] == conversation["id"]
+    assert inbox["unread"] == 3
+
+    response = await client.get(url, params={"limit": 2}, cookies=cookies(second))
+    page: dict = response.json()
+    assert [message["body"] for message in page["messages"]] == ["Message 2", "Message 1"]
+    assert inbox["last_message_id"] == page["messages"][0]["id"]
+    response = await client.get(
+        url, params={"limit": 2, "cursor": page["next_cursor"]}, cookies=cookies(second)
+    )
+    page = response.json()
+    assert [message["body"] for message in page["messages"]] == ["Message 0"]
+    assert page["next_cursor"] is None
+
+    response = await client.get(url, cookies=cookies(outsider))
+    assert response.status_code == 404
+    response = await client.post(url, json={"body": "Hi"}, cookies=cookies(outsider))
+    assert response.status_code == 404
+
+    response = await client.post(f"{url}/read", cookies=cookies(second))
+    assert response.status_code == 200
+    response = await client.get("/messages/unread", cookies=cookies(second))
+    assert response.json() == {"total": 0, "conversations": {}}
+
+
+async def test_group_conversation(client: AsyncClient, db_session: AsyncSession):
+    owner, *members = await create_users(db_session, "Member")
+    response = await client.post(
+        "/messages/conversations", json={"participants": members}, cookies=cookies(owner)
+    )
+    assert response.status_code == 201
+    assert response.json()["participants"] == [owner, *members]
+
+    response = await client.post(
+        "/messages/conversations", json={"participants": []}, cookies=cookies(owner)
+    )
+    assert response.status_code == 422
+    response = await client.post(
+        "/messages/conversations", json={"participants": [owner]}, cookies=cookies(owner)
+    )
+    assert response.status_code == 400
+    response = await client.post(
+        "/messages/conversations",
+        json={"participants": [100_000]},
+        cookies=cookies(owner),
+    )
+    assert response.status_code == 404
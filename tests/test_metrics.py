@@ -0,0 +1,61 @@
+from httpx import AsyncClient
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import COOKIE_NAME
+from src.core.jwt_utils import create_jwt
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_metrics_per_route(client: AsyncClient):
+    labels = {"method": "GET", "route": "/posts/hot/"}
+    requests_before: float = sample("http_requests_total", status="200", **labels)
+    queries_before: float = sample("db_queries_per_request_sum", route="/posts/hot/")
+
+    response = await client.get("/posts/hot/")
+    assert response.status_code == 200
+    assert sample("http_requests_total", status="200", **labels) == requests_before + 1
+    assert sample("http_request_duration_seconds_count", **labels) >= 1
+    assert sample("db_queries_per_request_sum", route="/posts/hot/") > queries_before
+
+    await client.get("/posts/hot/", params={"limit": 0})
+    assert sample("http_requests_total", status="422", **labels) >= 1
+
+    response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/posts/hot/",status="200"}' in (
+        response.text
+    )
+    assert "db_query_duration_seconds_bucket" in response.text
+
+
+async def test_user_cache_metrics_and_stats(client: AsyncClient):
+    cookies = {COOKIE_NAME: create_jwt("1")}
+    lookups_before: float = sample("user_cache_lookups_total", result="hit") + sample(
+        "user_cache_lookups_total", result="miss"
+    )
+    response = await client.get("/users/protected-route", cookies=cookies)
+    assert response.status_code == 200
+    lookups: float = sample("user_cache_lookups_total", result="hit") + sample(
+        "user_cache_lookups_total", result="miss"
+    )
+    assert lookups == lookups_before + 1
+
+    # статистика процесса в JSON доступна только суперпользователю
+    response = await client.get("/users/pool-stats", cookies=cookies)
+    assert response.status_code == 403
+
+
+async def test_query_latency_after_failed_statement(db_session: AsyncSession):
+    count_before: float = sample("db_query_duration_seconds_count")
+    with pytest.raises(OperationalError):
+        await db_session.execute(text("SELECT * FROM missing_table"))
+    await db_session.rollback()
+    await db_session.execute(text("SELECT 1"))
+    assert sample("db_query_duration_seconds_count") == count_before + 1
@@ -0,0 +1,44 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from src.core.pool_stats import InstrumentedQueuePool, instrument_engine
+
+
+async def test_pool_stats_overflow_and_timeout(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.sqlite3'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    stats = instrument_engine(engine, "test-pool")
+    labels = {"engine": "test-pool"}
+
+    first: AsyncConnection = await engine.connect()
+    second: AsyncConnection = await engine.connect()
+    await second.execute(text("SELECT 1"))
+    assert stats.checked_out == 2
+    assert stats.overflow_events == 1
+    with pytest.raises(exc.TimeoutError):
+        await engine.connect()
+    await first.close()
+    await second.close()
+
+    result: dict = stats.stats(engine.sync_engine.pool)
+    assert result["checked_out"] == 0
+    assert result["timeouts"] == 1
+    assert result["wait_seconds"]["count"] == 3
+    assert result["size"] == 1
+    assert REGISTRY.get_sample_value("db_pool_checked_out", labels) == 0
+    assert REGISTRY.get_sample_value("db_pool_overflow_total", labels) == 1
+    assert REGISTRY.get_sample_value("db_pool_timeouts_total", labels) == 1
+    assert REGISTRY.get_sample_value("db_pool_wait_seconds_count", labels) == 3
+
+    await engine.dispose()
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert stats.stats()["wait_seconds"]["count"] == 4
+    await engine.dispose()
@@ -0,0 +1,47 @@
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import get_async_session
+from src.core.exceptions import ExceptQueryBudget
+from src.core.query_budget import QueryBudgetMiddleware, query_budget, track_queries
+
+
+def make_app(session: AsyncSession) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get("/within")
+    @query_budget(2)
+    async def within(session: AsyncSession = Depends(get_async_session)):
+        await session.execute(text("SELECT 1"))
+        await session.execute(text("SELECT 2"))
+
+    @app.get("/n-plus-one")
+    async def n_plus_one(session: AsyncSession = Depends(get_async_session)):
+        for num in range(3):
+            await session.execute(text("SELECT :num"), {"num": num})
+
+    app.dependency_overrides[get_async_session] = lambda: session
+    return app
+
+
+async def test_query_budget_middleware(db_session: AsyncSession):
+    async with AsyncClient(app=make_app(db_session), base_url="http://test") as client:
+        assert (await client.get("/within")).status_code == 200
+        with pytest.raises(ExceptQueryBudget, match="possible N\\+1, 3 x SELECT"):
+            await client.get("/n-plus-one")
+
+
+async def test_track_queries(db_session: AsyncSession):
+    with track_queries() as tracker:
+        await db_session.execute(text("SELECT 1"))
+        await db_session.execute(text("SELECT 1"))
+    await db_session.execute(text("SELECT 1"))
+    assert tracker.count == 2
+    assert tracker.problems(budget=1, repeat_threshold=2) == [
+        "2 queries, budget 1",
+        "possible N+1, 2 x SELECT 1",
+    ]
@@ -0,0 +1,69 @@
+from typing import Iterator
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from fastapi.exceptions import HTTPException
+from httpx import AsyncClient
+from starlette.requests import Request
+
+from src.core import rate_limit
+from src.core.config import RateLimitRule, setting
+from src.core.rate_limit import RateLimit, deny_cache, take_token
+
+
+@pytest.fixture
+def rules(monkeypatch: pytest.MonkeyPatch) -> Iterator[dict[str, RateLimitRule]]:
+    rules: dict[str, RateLimitRule] = {
+        "test": RateLimitRule(rate=0.5, burst=2),
+        "login": RateLimitRule(rate=0.01, burst=1),
+    }
+    monkeypatch.setattr(setting.rate_limit, "rules", rules)
+    deny_cache.clear()
+    yield rules
+    deny_cache.clear()
+
+
+def make_request(host: str) -> Request:
+    return Request({"type": "http", "headers": [], "client": (host, 5000)})
+
+
+async def test_token_bucket(fake_redis: FakeRedis):
+    rule = RateLimitRule(rate=0.5, burst=2)
+    assert await take_token("rate-limit:bucket", rule) is None
+    assert await take_token("rate-limit:bucket", rule) is None
+    retry_after = await take_token("rate-limit:bucket", rule)
+    assert 0 < retry_after <= 2
+    assert await fake_redis.pttl("rate-limit:bucket") > 0
+
+
+async def test_local_deny_cache(rules, monkeypatch: pytest.MonkeyPatch):
+    limiter = RateLimit("test")
+    await limiter(make_request("10.0.0.1"))
+    await limiter(make_request("10.0.0.1"))
+    with pytest.raises(HTTPException) as exp:
+        await limiter(make_request("10.0.0.1"))
+    assert exp.value.status_code == 429
+    assert exp.value.headers["Retry-After"] == "2"
+
+    # повторный отказ без обращения к Redis
+    def no_redis():
+        raise AssertionError("Redis must not be called")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(rate_limit, "get_redis", no_redis)
+        with pytest.raises(HTTPException):
+            await limiter(make_request("10.0.0.1"))
+    # у другого клиента своя корзина
+    await limiter(make_request("10.0.0.2"))
+    await limiter(make_request("10.0.0.2"))
+    with pytest.raises(HTTPException):
+        await limiter(make_request("10.0.0.2"))
+
+
+async def test_login_rate_limit(rules, client: AsyncClient):
+    data = {"username": "limited@mail.ru", "password": "password"}
+    response = await client.post("/users/login", data=data)
+    assert response.status_code == 401
+    response = await client.post("/users/login", data=data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.core.config import COOKIE_NAME
+from src.core.jwt_utils import create_jwt
+from src.main import app
+from src.posts.realtime import Hub, hub
+from src.users.cache import cache_user
+from src.users.models import User
+
+
+async def test_hub_drops_slow_consumer():
+    events = Hub()
+    slow = events.connect(queue_size=2)
+    fast = events.connect(queue_size=10)
+    for num in range(3):
+        events.broadcast(f"event {num}")
+
+    assert slow.dropped.is_set()
+    assert events.stats() == {"connections": 1, "dropped": 1}
+    assert fast.queue.qsize() == 3
+    assert await fast.queue.get() == "event 0"
+
+
+def test_posts_events_websocket():
+    cache_user(
+        User(
+            id=1000,
+            username="Listener",
+            email="listener@mail.ru",
+            hashed_password="hash",
+            is_active=True,
+            is_superuser=False,
+        )
+    )
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as exp:
+        with client.websocket_connect("/posts/ws"):
+            pass
+    assert exp.value.code == 1008
+
+    client.cookies[COOKIE_NAME] = create_jwt("1000")
+    with client.websocket_connect("/posts/ws") as websocket:
+        websocket.portal.call(hub.broadcast, '{"type": "post", "id": 1}')
+        assert websocket.receive_json() == {"type": "post", "id": 1}
+    assert hub.stats()["connections"] == 0
@@ -0,0 +1,49 @@
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core import database
+from src.core.config import PRIMARY_COOKIE_NAME
+from src.core.database import get_async_session, get_read_session
+from src.core.middleware import ReadYourWritesMiddleware
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/write")
+    async def write(session: AsyncSession = Depends(get_async_session)):
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+        return "ok"
+
+    @app.get("/read")
+    async def read(session: AsyncSession = Depends(get_read_session)):
+        return session.get_bind().url.database.rsplit("/", 1)[-1]
+
+    return app
+
+
+async def test_read_replica_routing(tmp_path, monkeypatch):
+    primary = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    )
+    replica = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    )
+    monkeypatch.setattr(database, "async_session_maker", primary)
+    monkeypatch.setattr(database, "replica_session_makers", [replica])
+
+    async with AsyncClient(app=make_app(), base_url="http://test") as client:
+        assert (await client.get("/read")).json() == "replica.db"
+
+        response = await client.post("/write")
+        assert PRIMARY_COOKIE_NAME in response.cookies
+        assert (await client.get("/read")).json() == "primary.db"
+
+        client.cookies.delete(PRIMARY_COOKIE_NAME)
+        assert (await client.get("/read")).json() == "replica.db"
+        response = await client.get("/read")
+        assert PRIMARY_COOKIE_NAME not in response.cookies
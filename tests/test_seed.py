@@ -0,0 +1,47 @@
+import json
+import random
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.commands.seed import generate_dataset, import_dataset
+from src.core.database import Base
+from src.posts.models import LikesPost, Post
+from src.users.models import User
+
+
+async def test_seed_generate_and_import(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'seed.sqlite3'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    await generate_dataset(
+        session_maker, users=5, posts=20, likes=50, rng=random.Random(1), batch_size=7
+    )
+
+    users = tmp_path / "users.ndjson"
+    users.write_text(
+        json.dumps({"username": "Imported", "email": "imp@mail.ru", "password": "pw"})
+        + "\n"
+    )
+    posts = tmp_path / "posts.ndjson"
+    posts.write_text(json.dumps({"id_user": 6, "title": "Imported", "body": "Post"}))
+    likes = tmp_path / "likes.ndjson"
+    likes.write_text(json.dumps({"post_id": 21, "user_id": 1}))
+    await import_dataset(session_maker, users=users, posts=posts, likes=likes)
+
+    async with session_maker() as session:
+        assert await session.scalar(select(func.count()).select_from(User)) == 6
+        assert await session.scalar(select(func.count()).select_from(Post)) == 21
+        assert await session.scalar(select(func.count()).select_from(LikesPost)) == 51
+        assert await session.scalar(select(func.sum(Post.like_count))) == 51
+        # автор не лайкает свой пост
+        own_likes = await session.scalar(
+            select(func.count())
+            .select_from(LikesPost)
+            .join(Post, Post.id == LikesPost.post_id)
+            .where(Post.id_user == LikesPost.user_id)
+        )
+        assert own_likes == 0
+    await engine.dispose()
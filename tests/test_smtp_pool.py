@@ -0,0 +1,91 @@
+import smtplib
+from email.message import EmailMessage
+
+import pytest
+
+from src.tasks import smtp_pool
+from src.tasks.smtp_pool import SMTPPool
+
+
+class FakeSMTP:
+    connections: list["FakeSMTP"] = list()
+    # получатели, которых отклоняет сервер
+    refused: set[str] = set()
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.sent: list[EmailMessage] = list()
+        self.logged_in = False
+        self.broken = False
+        FakeSMTP.connections.append(self)
+
+    def starttls(self) -> None:
+        pass
+
+    def login(self, user: str, password: str) -> None:
+        self.logged_in = True
+
+    def noop(self) -> tuple[int, bytes]:
+        if self.broken:
+            raise smtplib.SMTPServerDisconnected()
+        return 250, b"OK"
+
+    def send_message(self, email: EmailMessage) -> None:
+        if self.broken:
+            raise smtplib.SMTPServerDisconnected()
+        if email["To"] in self.refused:
+            raise smtplib.SMTPRecipientsRefused({email["To"]: (550, b"No such user")})
+        self.sent.append(email)
+
+    def quit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch) -> SMTPPool:
+    FakeSMTP.connections = list()
+    monkeypatch.setattr(smtp_pool.smtplib, "SMTP", FakeSMTP)
+    return SMTPPool("smtp", 587, "user", "password", size=2, max_idle=30, timeout=5)
+
+
+def make_email(num: int) -> EmailMessage:
+    email = EmailMessage()
+    email["To"] = f"user{num}@mail.ru"
+    email.set_content("like")
+    return email
+
+
+def test_smtp_pool_reuses_connection(pool: SMTPPool):
+    pool.send(make_email(1))
+    assert pool.send_many(make_email(num) for num in range(3)) == 3
+    assert len(FakeSMTP.connections) == 1
+    assert FakeSMTP.connections[0].logged_in
+    assert len(FakeSMTP.connections[0].sent) == 4
+
+
+def test_smtp_pool_reconnects(pool: SMTPPool):
+    pool.send(make_email(1))
+    FakeSMTP.connections[0].broken = True
+    assert pool.send_many([make_email(2), make_email(3)]) == 2
+    assert len(FakeSMTP.connections) == 2
+    assert len(FakeSMTP.connections[1].sent) == 2
+
+
+def test_smtp_pool_refused_after_reconnect(pool: SMTPPool, monkeypatch):
+    pool.send(make_email(1))
+    FakeSMTP.connections[0].broken = True
+    # новое соединение отклоняет получателя повторно отправляемого письма
+    monkeypatch.setattr(FakeSMTP, "refused", {"user2@mail.ru"})
+    assert pool.send_many([make_email(2), make_email(3)]) == 1
+    assert [email["To"] for email in FakeSMTP.connections[1].sent] == ["user3@mail.ru"]
+
+
+def test_smtp_pool_drops_stale_connection(pool: SMTPPool):
+    pool.max_idle = 0
+    pool.send(make_email(1))
+    FakeSMTP.connections[0].broken = True
+    pool.send(make_email(2))
+    assert len(FakeSMTP.connections) == 2
+    assert len(FakeSMTP.connections[1].sent) == 1